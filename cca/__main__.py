@@ -0,0 +1,5 @@
+import sys
+
+from cca.cli import main
+
+sys.exit(main())
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from cca.bootstrap import CONFIDENCE, bootstrap_ci
+
+
+def stack_runs(df, columns, run_column="run", align_on="target"):
+    """Pivot long-format results into one (points x runs) matrix per column.
+
+    Rows are aligned on ``align_on`` (the target QPS by default), so runs of
+    different lengths line up and missing points become NaN. If a run repeats
+    an alignment key, its last row wins.
+    """
+    keys, point_index = np.unique(df[align_on].to_numpy(), return_inverse=True)
+    runs, run_index = np.unique(df[run_column].to_numpy(), return_inverse=True)
+
+    stacked = {}
+    for column in columns:
+        matrix = np.full((len(keys), len(runs)), np.nan)
+        matrix[point_index, run_index] = df[column].to_numpy(dtype=float)
+        stacked[column] = matrix
+    return keys, runs, stacked
+
+
+def summarize(matrix, percentiles=()):
+    """Reduce a (points x runs) matrix along the run axis, ignoring NaNs."""
+    count = np.sum(~np.isnan(matrix), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(matrix, axis=1)
+        std = np.nanstd(matrix, axis=1, ddof=1)
+        sem = std / np.sqrt(count)
+    summary = {"count": count, "mean": mean, "std": std, "sem": sem}
+    if percentiles:
+        values = np.nanpercentile(matrix, percentiles, axis=1)
+        for percentile, row in zip(percentiles, values):
+            summary[f"p{percentile}"] = row
+    return summary
+
+
+def aggregate(df, columns, percentiles=(), run_column="run", align_on="target", bootstrap=0, confidence=CONFIDENCE):
+    """Mean, SEM, std and percentiles of ``columns`` across runs per ``align_on``.
+
+    Returns one row per alignment key with columns named ``"<column> <stat>"``,
+    e.g. ``"p95 mean"`` or ``"QPS std"``. ``std``/``sem`` use ddof=1 like
+    ``scipy.stats.tstd``/``scipy.stats.sem``. With ``bootstrap`` resamples,
+    ``"<column> ci low"``/``"<column> ci high"`` hold a percentile bootstrap
+    interval of the mean.
+    """
+    keys, _, stacked = stack_runs(df, columns, run_column=run_column, align_on=align_on)
+    result = {align_on: keys}
+    for column, matrix in stacked.items():
+        for stat, values in summarize(matrix, percentiles).items():
+            result[f"{column} {stat}"] = values
+        if bootstrap:
+            result[f"{column} ci low"], result[f"{column} ci high"] = bootstrap_ci(matrix, confidence, bootstrap)
+    return pd.DataFrame(result)
+
+
+def aggregate_by(df, by, columns, percentiles=(), run_column="run", align_on="target", bootstrap=0,
+                 confidence=CONFIDENCE):
+    """Run :func:`aggregate` once per value of ``by`` (e.g. per config)."""
+    frames = []
+    for key, group in df.groupby(by, sort=False, observed=True):
+        frame = aggregate(group, columns, percentiles, run_column=run_column, align_on=align_on,
+                          bootstrap=bootstrap, confidence=confidence)
+        frame.insert(0, by, key)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+
+def overlap_ms(window_start, window_end, job_start, job_end):
+    """(windows x jobs) matrix of overlap in ms between mcperf windows and job runtimes."""
+    start = np.maximum(window_start[:, None], job_start[None, :])
+    end = np.minimum(window_end[:, None], job_end[None, :])
+    return np.clip(end - start, 0, None)
+
+
+def _ratio_frame(keys, key_name, mask, violated):
+    windows = mask.sum(axis=0)
+    violations = (mask & violated[:, None]).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(windows > 0, violations / windows, 0.0)
+    return pd.DataFrame({key_name: keys, "windows": windows, "violations": violations, "violation_ratio": ratio})
+
+
+def attribute(mcperf, timeline, slo_us=1000):
+    """Which batch jobs were running while memcached p95 was above the SLO.
+
+    ``mcperf`` needs ``ts_start``/``ts_end``/``p95``, ``timeline`` the
+    completed jobs from :func:`cca.pods.pod_timelines` (memcached excluded).
+    A job counts as running in a window if their intervals overlap at all.
+    Returns DataFrames keyed ``"total"``, ``"job"``, ``"node"`` and
+    ``"co_running"``.
+    """
+    window_start = mcperf["ts_start"].to_numpy(dtype=np.int64)
+    window_end = mcperf["ts_end"].to_numpy(dtype=np.int64)
+    violated = mcperf["p95"].to_numpy() > slo_us
+
+    jobs = timeline["job"].to_numpy()
+    running = overlap_ms(window_start, window_end, timeline["start_ms"].to_numpy(), timeline["end_ms"].to_numpy()) > 0
+
+    nodes, node_index = np.unique(timeline["node"].to_numpy(), return_inverse=True)
+    node_running = np.zeros((len(window_start), len(nodes)), dtype=bool)
+    for i in range(len(nodes)):
+        node_running[:, i] = running[:, node_index == i].any(axis=1)
+
+    # Encode each window's set of running jobs as a bit pattern and group by it
+    bits = running.astype(np.int64) @ (np.int64(1) << np.arange(len(jobs), dtype=np.int64))
+    patterns, pattern_index = np.unique(bits, return_inverse=True)
+    order = np.argsort(jobs)
+    labels = ["+".join(jobs[order][(p >> order) & 1 == 1]) or "(none)" for p in patterns]
+    pattern_mask = pattern_index[:, None] == np.arange(len(patterns))[None, :]
+
+    total = pd.DataFrame({
+        "windows": [len(window_start)],
+        "violations": [int(violated.sum())],
+        "violation_ratio": [float(violated.mean()) if len(violated) else 0.0],
+    })
+    return {
+        "total": total,
+        "job": _ratio_frame(jobs, "job", running, violated),
+        "node": _ratio_frame(nodes, "node", node_running, violated),
+        "co_running": _ratio_frame(labels, "co_running", pattern_mask, violated).sort_values("windows", ascending=False),
+    }
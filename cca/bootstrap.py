@@ -0,0 +1,51 @@
+import warnings
+
+import numpy as np
+
+RESAMPLES = 2000
+CONFIDENCE = 0.95
+SEED = 0
+# Upper bound on the elements of one gathered (points x resamples x runs) chunk
+CHUNK_ELEMENTS = 1 << 22
+
+
+def resample_indices(runs, resamples=RESAMPLES, seed=SEED):
+    """(resamples x runs) run indices drawn with replacement."""
+    return np.random.default_rng(seed).integers(0, runs, size=(resamples, runs))
+
+
+def bootstrap_distribution(matrix, resamples=RESAMPLES, seed=SEED, statistic=np.nanmean,
+                           chunk_elements=CHUNK_ELEMENTS):
+    """Bootstrap distribution of ``statistic`` across runs for every point at once.
+
+    ``matrix`` is (points x runs), as built by :func:`cca.aggregate.stack_runs`.
+    Resamples are gathered into (points x chunk x runs) arrays of at most
+    ``chunk_elements`` elements and reduced along the run axis, so memory stays
+    bounded while the work is still a few NumPy passes instead of a Python loop
+    per point and resample. The result does not depend on the chunk size. NaN
+    (missing) runs are ignored by the default ``np.nanmean``.
+    """
+    points, runs = matrix.shape
+    indices = resample_indices(runs, resamples, seed)
+    chunk = max(1, chunk_elements // max(1, points * runs))
+    distribution = np.empty((points, resamples))
+    with warnings.catch_warnings():
+        # Resamples that only drew missing runs give NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start in range(0, resamples, chunk):
+            distribution[:, start:start + chunk] = statistic(matrix[:, indices[start:start + chunk]], axis=2)
+    return distribution
+
+
+def bootstrap_ci(matrix, confidence=CONFIDENCE, resamples=RESAMPLES, seed=SEED, statistic=np.nanmean):
+    """Percentile bootstrap interval of ``statistic`` per point; returns (low, high) arrays.
+
+    The default seed is fixed so that repeated runs (and the figure cache)
+    see identical intervals for identical data.
+    """
+    distribution = bootstrap_distribution(matrix, resamples, seed, statistic)
+    tail = (1 - confidence) / 2 * 100
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low, high = np.nanpercentile(distribution, [tail, 100 - tail], axis=1)
+    return low, high
@@ -0,0 +1,126 @@
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from cca.aggregate import stack_runs
+from cca.store import ResultStore, canonical_run
+
+SLO_US = 1000
+TOLERANCE = 0.05
+CONFIDENCE = 0.95
+
+
+def slo_crossing(qps, p95, slo_us):
+    """Highest achieved QPS of one scan that keeps p95 within ``slo_us``.
+
+    The scan is walked in target order up to its first violation and the QPS is
+    interpolated linearly between the last point meeting the SLO and that
+    violation. Returns ``(qps, censored)``: ``censored`` is True when the scan
+    never violated the SLO, so the result is only a lower bound. Returns NaN
+    if even the first point violates it.
+    """
+    valid = ~(np.isnan(qps) | np.isnan(p95))
+    qps, p95 = qps[valid], p95[valid]
+    if len(qps) == 0:
+        return np.nan, False
+
+    violations = np.flatnonzero(p95 > slo_us)
+    if len(violations) == 0:
+        return float(qps.max()), True
+    first = violations[0]
+    if first == 0:
+        return np.nan, False
+
+    (q0, q1), (l0, l1) = qps[first - 1:first + 1], p95[first - 1:first + 1]
+    return float(q0 + (slo_us - l0) * (q1 - q0) / (l1 - l0)), False
+
+
+def divergence_target(target, qps, tolerance=TOLERANCE):
+    """First target QPS whose achieved QPS falls more than ``tolerance`` below it (NaN if none)."""
+    behind = np.flatnonzero(qps < (1 - tolerance) * target)
+    return float(target[behind[0]]) if len(behind) else np.nan
+
+
+def confidence_interval(values, confidence=CONFIDENCE):
+    """Student-t interval of the mean of ``values``; NaN bounds with fewer than two values.
+
+    A QPS can't be negative, so the lower bound is clipped at 0 (with few,
+    widely spread runs the t interval reaches below it).
+    """
+    values = values[~np.isnan(values)]
+    if len(values) < 2:
+        return np.nan, np.nan
+    half = stats.t.ppf((1 + confidence) / 2, len(values) - 1) * stats.sem(values)
+    return max(0.0, float(values.mean() - half)), float(values.mean() + half)
+
+
+def capacity(df, slo_us=SLO_US, tolerance=TOLERANCE, confidence=CONFIDENCE, run_column="run", align_on="target"):
+    """Max sustainable QPS of one config across its runs.
+
+    ``df`` holds ``p95`` (us), ``QPS`` and ``target`` rows of all runs of the
+    config. Returns a dict with the mean, confidence bounds, min and max of the
+    per-run capacity, how many runs never crossed the SLO and the median target
+    at which achieved QPS starts lagging behind.
+    """
+    targets, runs, stacked = stack_runs(df, ["QPS", "p95"], run_column=run_column, align_on=align_on)
+    targets = targets.astype(float)
+    capacities = np.empty(len(runs))
+    divergences = np.empty(len(runs))
+    censored = 0
+    for j in range(len(runs)):
+        capacities[j], was_censored = slo_crossing(stacked["QPS"][:, j], stacked["p95"][:, j], slo_us)
+        censored += was_censored
+        measured = ~np.isnan(stacked["QPS"][:, j])
+        divergences[j] = divergence_target(targets[measured], stacked["QPS"][measured, j], tolerance)
+
+    low, high = confidence_interval(capacities, confidence)
+    with warnings.catch_warnings():
+        # All-NaN columns (every run violates at its first point) just give NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return {
+            "runs": len(runs),
+            "capacity mean": np.nanmean(capacities),
+            "capacity low": low,
+            "capacity high": high,
+            "capacity min": np.nanmin(capacities),
+            "capacity max": np.nanmax(capacities),
+            "censored": censored,
+            "divergence target": np.nanmedian(divergences),
+        }
+
+
+def capacity_by(df, by="config", **kwargs):
+    """Run :func:`capacity` once per value of ``by``."""
+    rows = []
+    for key, group in df.groupby(by, sort=False, observed=True):
+        rows.append({by: key, **capacity(group, **kwargs)})
+    return pd.DataFrame(rows)
+
+
+def experiment_capacity(experiment, store=None, **kwargs):
+    store = store or ResultStore()
+    df = store.query(["p95", "QPS", "target"], experiment=experiment, run=canonical_run)
+    return capacity_by(df, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Max sustainable QPS under a p95 SLO per config.")
+    parser.add_argument("experiments", nargs="+", metavar="experiment")
+    parser.add_argument("--slo", type=float, default=SLO_US, help="p95 SLO in us")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="relative shortfall of achieved QPS that counts as diverging from the target")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    args = parser.parse_args(argv)
+
+    store = ResultStore()
+    for experiment in args.experiments:
+        table = experiment_capacity(experiment, store, slo_us=args.slo, tolerance=args.tolerance, confidence=args.confidence)
+        print(f"== {experiment} (p95 <= {args.slo:g}us, {args.confidence:.0%} confidence)")
+        print(table.to_string(index=False, float_format=lambda v: f"{v:.0f}"))
+
+
+if __name__ == "__main__":
+    main()
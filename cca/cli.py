@@ -0,0 +1,157 @@
+import argparse
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+# Only the standard library is imported here; every command imports what it needs itself
+# so that quick queries like ``times`` don't pay for numpy, pandas or matplotlib.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLOT_SCRIPTS = {
+    "part1": (REPO_ROOT, "part1_plots.py"),
+    "part4_q1": (REPO_ROOT, "part4_q1_plots.py"),
+    "part3": (os.path.join(REPO_ROOT, "part3"), "plot.py"),
+}
+PARSEC_JOBS = 7
+RUN_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def forward(module):
+    def command(args):
+        import importlib
+        sys.argv[0] = f"cca {args.command}"
+        return importlib.import_module(module).main(args.args)
+    return command
+
+
+def print_times(runs):
+    """Print the runtime of each job and the total PARSEC makespan, like the original get_time.py."""
+    completed = True
+    parsec = []
+    for (name, start_ms, end_ms) in runs:
+        print("Job: ", str(name))
+        if str(name) == "memcached":
+            continue
+        if start_ms >= 0 and end_ms >= 0:
+            print("Job time: ", timedelta(milliseconds=end_ms - start_ms))
+            parsec.append((start_ms, end_ms))
+        else:
+            print("Job {0} has not completed....".format(name))
+            completed = False
+
+    if not completed:
+        return
+    if len(parsec) != PARSEC_JOBS:
+        print("You haven't run all the PARSEC jobs.")
+        return
+    print("Total time: {0}".format(timedelta(milliseconds=max(end for (_, end) in parsec) - min(start for (start, _) in parsec))))
+
+
+def times(args):
+    from cca.watch import read_job_times
+
+    # Reads the plots' hashed timeline cache when it has the dump, without importing pandas
+    if len(args.files) > 1 and args.workers != 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            runs = list(executor.map(read_job_times, args.files))
+    else:
+        runs = [read_job_times(file_path) for file_path in args.files]
+    for (file_path, file_runs) in zip(args.files, runs):
+        if len(args.files) > 1:
+            print(f"== {file_path}")
+        print_times(file_runs)
+
+
+def ingest(args):
+    from cca.mcperf import read_mcperf
+    from cca.store import ResultStore
+    from cca.transform import MEASUREMENT_TYPES
+
+    df = read_mcperf(args.file)
+    run = args.run or datetime.now().strftime(RUN_FORMAT)
+    path = ResultStore().write(args.experiment, MEASUREMENT_TYPES[args.type], run, df)
+    print(f"Stored {len(df)} rows in {path}")
+
+
+def aggregate(args):
+    from cca.aggregate import aggregate_by
+    from cca.store import ResultStore
+
+    df = ResultStore().query(args.columns + [args.align_on], experiment=args.experiment, config=args.config or None)
+    if df.empty:
+        print(f"No results stored for {args.experiment}")
+        return 1
+    summary = aggregate_by(df, "config", args.columns, align_on=args.align_on, bootstrap=args.bootstrap)
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+
+def plot(args):
+    status = 0
+    for name in args.plots or sorted(PLOT_SCRIPTS):
+        (cwd, script) = PLOT_SCRIPTS[name]
+        status = status or subprocess.run([sys.executable, script] + args.args, cwd=cwd).returncode
+    return status
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cca", description="Cloud computing architecture project tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for (name, module, help) in [
+        ("transform", "cca.transform", "load mcperf outputs into the result store"),
+        ("schedule", "cca.schedule", "plan a part3 schedule"),
+        ("speedup", "cca.speedup", "fit speedup models to the part2b thread runtimes"),
+        ("sensitivity", "cca.sensitivity", "interference sensitivity matrix and colocation recommendations"),
+        ("simulate", "cca.simulate", "simulate part3 plans"),
+        ("analyze", "cca.log_analysis", "join a scheduler log with mcperf latencies"),
+        ("capacity", "cca.capacity", "max sustainable QPS under a p95 SLO per config"),
+        ("search", "cca.loadgen", "adaptive mcperf scan around the SLO knee"),
+        ("stream", "cca.stream", "parse mcperf output live and stop saturated runs"),
+        ("control", "cca.controller", "run or replay the part4 core controller"),
+    ]:
+        # Everything after the command name is parsed by the module's own main
+        command = commands.add_parser(name, help=help, add_help=False)
+        command.set_defaults(handler=forward(module), passthrough=True)
+
+    command = commands.add_parser("times", help="print job runtimes from kubectl pod dumps")
+    command.add_argument("files", nargs="+")
+    command.add_argument("-j", "--workers", type=int, default=None, help="parallel extraction processes")
+    command.set_defaults(handler=times)
+
+    command = commands.add_parser("ingest", help="store one part1 mcperf output")
+    command.add_argument("file")
+    command.add_argument("type", type=int, help="interference type (0 = none, 1-6 = ibench cpu/l1d/l1i/l2/llc/membw)")
+    command.add_argument("--experiment", default="part1")
+    command.add_argument("--run", default=None, help=f"run name (default: current time as {RUN_FORMAT})")
+    command.set_defaults(handler=ingest)
+
+    command = commands.add_parser("aggregate", help="print cross-run statistics per config")
+    command.add_argument("experiment")
+    command.add_argument("--config", nargs="*", default=[])
+    command.add_argument("--columns", nargs="+", default=["p95", "QPS"])
+    command.add_argument("--align-on", default="target")
+    command.add_argument("--bootstrap", type=int, default=0, metavar="RESAMPLES",
+                         help="add 95%% bootstrap confidence intervals of the means")
+    command.set_defaults(handler=aggregate)
+
+    command = commands.add_parser("plot", help="render figures (extra arguments go to the plot scripts)")
+    command.add_argument("plots", nargs="*", metavar="plot", help=f"one of {sorted(PLOT_SCRIPTS)} (default: all)")
+    command.set_defaults(handler=plot, passthrough=True)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "plot":
+        unknown = [p for p in args.plots if p not in PLOT_SCRIPTS]
+        if unknown:
+            parser.error(f"unknown plots: {unknown}")
+    if getattr(args, "passthrough", False):
+        args.args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.handler(args)
@@ -0,0 +1,83 @@
+class ColocationModel:
+    """How fast jobs progress while they share nodes and cores.
+
+    This is the one model behind both :mod:`cca.schedule` and
+    :mod:`cca.simulate`. A job alone on its cores runs in ``runtime(job,
+    threads)`` seconds, with threads capped at its core count (oversubscribed
+    threads add no parallelism). Jobs pinned to the same core split it. While
+    another job runs on the same node, or memcached has cores reserved there,
+    a job is slowed by ``1 + colocation_weight * penalties[job]``.
+    """
+
+    def __init__(self, nodes, runtime, penalties=None, colocation_weight=0.5):
+        self.nodes = {node.name: node for node in nodes}
+        self.runtime = runtime
+        self.penalties = penalties or {}
+        self.colocation_weight = colocation_weight
+
+    def isolated_runtime(self, job, threads, cores):
+        return self.runtime(job, min(threads, cores))
+
+    def factor(self, job, node, shared):
+        """Slowdown of ``job`` on ``node`` when ``shared`` with another job."""
+        if shared or self.nodes[node].reserved:
+            return 1 + self.colocation_weight * self.penalties.get(job, 0.0)
+        return 1.0
+
+    def rates(self, running, placements):
+        """Fraction of its work every running job does per second."""
+        core_load = {}
+        for job in running:
+            p = placements[job]
+            for core in p.cores:
+                core_load[(p.node, core)] = core_load.get((p.node, core), 0) + 1
+
+        rates = {}
+        for job in running:
+            p = placements[job]
+            shared = any(placements[other].node == p.node for other in running if other != job)
+            share = sum(1 / core_load[(p.node, core)] for core in p.cores) / len(p.cores)
+            runtime = self.isolated_runtime(job, p.threads, len(p.cores))
+            rates[job] = share / (runtime * self.factor(job, p.node, shared))
+        return rates
+
+    def replay(self, placements):
+        """Run ``{job: Placement}`` with every job starting once its ``after`` jobs finished.
+
+        Returns ``(start, end, busy_core_seconds)`` with the start and end of
+        every job in seconds and the busy core time per node.
+        """
+        waiting = {job: set(p.after) for (job, p) in placements.items()}
+        remaining = {}
+        start, end = {}, {}
+        busy_core_seconds = {name: 0.0 for name in self.nodes}
+        now = 0.0
+
+        def start_ready():
+            for job in [job for (job, blockers) in waiting.items() if not blockers]:
+                del waiting[job]
+                start[job] = now
+                remaining[job] = 1.0
+
+        start_ready()
+        while remaining:
+            rates = self.rates(remaining, placements)
+            step = min(remaining[job] / rates[job] for job in remaining)
+
+            busy = {(placements[job].node, core) for job in remaining for core in placements[job].cores}
+            for (node, _) in busy:
+                busy_core_seconds[node] += step
+            now += step
+
+            for job in list(remaining):
+                remaining[job] -= rates[job] * step
+                if remaining[job] <= 1e-9:
+                    del remaining[job]
+                    end[job] = now
+                    for blockers in waiting.values():
+                        blockers.discard(job)
+            start_ready()
+
+        if waiting:
+            raise ValueError(f"Jobs never become ready: {sorted(waiting)}")
+        return start, end, busy_core_seconds
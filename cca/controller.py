@@ -0,0 +1,336 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from cca.stream import follow, iter_rows
+from scheduler_logger import Job, SchedulerLogger
+
+SLO_US = 1000
+# Cores of the part4 memcached VM, which replayed traces were recorded on
+PART4_CORES = 4
+
+
+class Sample(NamedTuple):
+    timestamp: float
+    qps: Optional[float] = None
+    p95: Optional[float] = None
+    cpu: Optional[float] = None
+
+
+class ThresholdPolicy:
+    """Grow on high load or latency near the SLO; shrink after sustained low load."""
+
+    def __init__(self, grow_qps=40000, shrink_qps=30000, slo_us=SLO_US, headroom=0.9, patience=3):
+        self.grow_qps = grow_qps
+        self.shrink_qps = shrink_qps
+        self.limit_us = slo_us * headroom
+        self.patience = patience
+        self.calm_samples = 0
+
+    def decide(self, sample, cores):
+        if sample.qps is None and sample.p95 is None:
+            # No load signal (e.g. the mcperf stream stalled): keep the current cores
+            return cores
+        hot = ((sample.qps is not None and sample.qps >= self.grow_qps)
+               or (sample.p95 is not None and sample.p95 >= self.limit_us))
+        calm = ((sample.qps is None or sample.qps < self.shrink_qps)
+                and (sample.p95 is None or sample.p95 < self.limit_us))
+        self.calm_samples = self.calm_samples + 1 if calm else 0
+        if hot:
+            return 2
+        if cores == 2 and self.calm_samples >= self.patience:
+            return 1
+        return cores
+
+
+class CpuUtilizationPolicy:
+    """Decide on memcached CPU usage (busy cores) only."""
+
+    def __init__(self, grow_util=0.8, shrink_util=0.6, patience=3):
+        self.grow_util = grow_util
+        self.shrink_util = shrink_util
+        self.patience = patience
+        self.calm_samples = 0
+
+    def decide(self, sample, cores):
+        if sample.cpu is None:
+            return cores
+        self.calm_samples = self.calm_samples + 1 if sample.cpu < self.shrink_util else 0
+        if cores == 1 and sample.cpu >= self.grow_util:
+            return 2
+        if cores == 2 and self.calm_samples >= self.patience:
+            return 1
+        return cores
+
+
+POLICIES = {
+    "threshold": ThresholdPolicy,
+    "cpu": CpuUtilizationPolicy,
+}
+
+
+def format_cpus(cores):
+    return ",".join(str(c) for c in cores)
+
+
+class TasksetActuator:
+    """Pins every thread of a process (memcached) to a cpuset."""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def set_cores(self, job, cores):
+        subprocess.run(["sudo", "taskset", "-a", "-cp", format_cpus(cores), str(self.pid)], check=True, capture_output=True)
+
+
+class DockerActuator:
+    """Changes the cpuset of the containers running batch jobs."""
+
+    def __init__(self, containers):
+        self.containers = containers
+
+    def set_cores(self, job, cores):
+        subprocess.run(["docker", "update", "--cpuset-cpus", format_cpus(cores), self.containers[job]], check=True, capture_output=True)
+
+
+class RecordingActuator:
+    def __init__(self):
+        self.calls = []
+
+    def set_cores(self, job, cores):
+        self.calls.append((job, list(cores)))
+
+
+class CoreController:
+    """Moves cores between memcached (1 or 2 cores) and the running batch jobs.
+
+    The policy turns each sample into a memcached core count; every change is
+    applied through the actuators and logged with ``SchedulerLogger``.
+    """
+
+    def __init__(self, policy, memcached, batch, logger, total_cores=None, cores=1):
+        self.policy = policy
+        self.memcached = memcached
+        self.batch = batch
+        self.logger = logger
+        self.total_cores = total_cores or os.cpu_count()
+        self.cores = cores
+        self.batch_jobs = []
+
+    def memcached_cores(self, cores=None):
+        return list(range(cores or self.cores))
+
+    def batch_cores(self, cores=None):
+        return list(range(cores or self.cores, self.total_cores))
+
+    def set_batch_jobs(self, jobs):
+        self.batch_jobs = list(jobs)
+        for job in self.batch_jobs:
+            self.batch.set_cores(job, self.batch_cores())
+            self.logger.update_cores(job, self.batch_cores())
+
+    def step(self, sample):
+        cores = self.policy.decide(sample, self.cores)
+        if cores == self.cores:
+            return False
+
+        # Shrink batch jobs before memcached grows so the two never overlap
+        if cores > self.cores:
+            self._update_batch(cores)
+            self._update_memcached(cores)
+        else:
+            self._update_memcached(cores)
+            self._update_batch(cores)
+        self.logger.custom_event(Job.MEMCACHED, f"qps={sample.qps} p95={sample.p95} cpu={sample.cpu} cores={cores}")
+        self.cores = cores
+        return True
+
+    def _update_memcached(self, cores):
+        self.memcached.set_cores(Job.MEMCACHED, self.memcached_cores(cores))
+        self.logger.update_cores(Job.MEMCACHED, self.memcached_cores(cores))
+
+    def _update_batch(self, cores):
+        for job in self.batch_jobs:
+            self.batch.set_cores(job, self.batch_cores(cores))
+            self.logger.update_cores(job, self.batch_cores(cores))
+
+    def run(self, sampler, interval=0.25, should_stop=lambda: False):
+        next_sample = time.monotonic()
+        while not should_stop():
+            self.step(sampler.sample())
+            next_sample += interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+
+
+class ProcCpuSampler:
+    """Busy cores of a process from the utime+stime ticks in /proc/<pid>/stat."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks_per_second = os.sysconf("SC_CLK_TCK")
+        self.last = self._read()
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat", "r") as file:
+            # Fields after the parenthesised command name; utime and stime are fields 14 and 15
+            fields = file.read().rsplit(")", 1)[1].split()
+        return time.monotonic(), int(fields[11]) + int(fields[12])
+
+    def sample(self):
+        now, ticks = self._read()
+        last_time, last_ticks = self.last
+        self.last = (now, ticks)
+        cpu = (ticks - last_ticks) / self.ticks_per_second / (now - last_time) if now > last_time else 0.0
+        return Sample(time.time(), cpu=cpu)
+
+
+class McperfSampler:
+    """Latest QPS and p95 of mcperf output while it is written, e.g. a followed file or a pipe.
+
+    A background thread parses the rows as they arrive. A row older than
+    ``max_age`` seconds is not reported, so a stalled stream doesn't keep
+    the controller on an old latency.
+    """
+
+    def __init__(self, lines, max_age=30.0):
+        self.max_age = max_age
+        self.latest = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._read, args=(lines,), daemon=True)
+        self.thread.start()
+
+    def _read(self, lines):
+        for row in iter_rows(lines):
+            with self.lock:
+                self.latest = (time.monotonic(), row)
+
+    def sample(self):
+        with self.lock:
+            latest = self.latest
+        if latest is None or time.monotonic() - latest[0] > self.max_age:
+            return Sample(time.time())
+        return Sample(time.time(), qps=float(latest[1]["QPS"]), p95=float(latest[1]["p95"]))
+
+
+class CombinedSampler:
+    """Merges the fields of several samplers, e.g. mcperf latency and process CPU."""
+
+    def __init__(self, *samplers):
+        self.samplers = samplers
+
+    def sample(self):
+        samples = [sampler.sample() for sampler in self.samplers]
+        fields = {field: next((getattr(s, field) for s in samples if getattr(s, field) is not None), None)
+                  for field in ("qps", "p95", "cpu")}
+        return Sample(time.time(), **fields)
+
+
+class LatencyModel:
+    """p95 as a function of offered load for each memcached core count.
+
+    Built from the part4 q1 scans, e.g. ``{1: "t_2_c_1", 2: "t_2_c_2"}``.
+    """
+
+    def __init__(self, curves):
+        self.curves = curves
+
+    @classmethod
+    def from_store(cls, configs, store=None):
+        from cca.aggregate import aggregate
+        from cca.store import ResultStore, canonical_run
+
+        store = store or ResultStore()
+        curves = {}
+        for (cores, config) in configs.items():
+            summary = aggregate(store.query(["p95", "target"], experiment="part4_q1", config=config, run=canonical_run), ["p95"])
+            curves[cores] = (summary["target"].to_numpy(dtype=float), summary["p95 mean"].to_numpy())
+        return cls(curves)
+
+    def p95(self, cores, qps):
+        targets, p95 = self.curves[cores]
+        return float(np.interp(qps, targets, p95))
+
+
+def replay(controller, trace, latency_model, slo_us=SLO_US):
+    """Drive the controller with the load of a recorded mcperf trace.
+
+    The latency the controller sees is predicted for the core count it chose,
+    so its decisions feed back into the observed p95.
+    """
+    offered = trace["target"].to_numpy(dtype=float)
+    times = trace["ts_start"].to_numpy() / 1000 if "ts_start" in trace else np.arange(len(trace), dtype=float)
+    cores = np.empty(len(trace), dtype=np.int64)
+    p95 = np.empty(len(trace))
+    for i in range(len(trace)):
+        p95[i] = latency_model.p95(controller.cores, offered[i])
+        cores[i] = controller.cores
+        controller.step(Sample(float(times[i]), qps=float(offered[i]), p95=p95[i]))
+
+    return {
+        "samples": len(trace),
+        "slo_violations": int(np.sum(p95 > slo_us)),
+        "mean_memcached_cores": float(cores.mean()) if len(cores) else 0.0,
+        "core_changes": int(np.sum(cores[1:] != cores[:-1])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Closed-loop memcached core controller.")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default=None,
+                        help="default: threshold, or cpu for live without --mcperf (no load signal on the server)")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    live = subparsers.add_parser("live", help="control a running memcached process")
+    live.add_argument("pid", type=int)
+    live.add_argument("--interval", type=float, default=0.25)
+    live.add_argument("--mcperf", metavar="FILE",
+                      help="mcperf output to take QPS and p95 from as it is written; '-' reads a pipe on stdin, "
+                           "e.g. ssh client-measure ./mcperf ... | python -m cca control live PID --mcperf -")
+    live.add_argument("--max-age", type=float, default=30.0, help="ignore mcperf rows older than this many seconds")
+    live.add_argument("--cores", type=int, default=os.cpu_count(),
+                      help="cores shared by memcached and the batch jobs (default: all cores of this host)")
+    live.add_argument("--container", action="append", default=[], metavar="JOB=CONTAINER",
+                      help="batch job container to receive the cores memcached does not use")
+
+    replay_parser = subparsers.add_parser("replay", help="replay a recorded mcperf trace")
+    replay_parser.add_argument("trace", help="mcperf output file")
+    replay_parser.add_argument("--one-core", default="t_2_c_1", help="part4 q1 config for memcached on 1 core")
+    replay_parser.add_argument("--two-cores", default="t_2_c_2", help="part4 q1 config for memcached on 2 cores")
+    args = parser.parse_args(argv)
+
+    latency_signal = args.mode == "replay" or args.mcperf is not None
+    policy = POLICIES[args.policy or ("threshold" if latency_signal else "cpu")]()
+    logger = SchedulerLogger()
+    try:
+        if args.mode == "live":
+            containers = dict(item.split("=", 1) for item in args.container)
+            jobs = {Job(job): container for (job, container) in containers.items()}
+            controller = CoreController(policy, TasksetActuator(args.pid), DockerActuator(jobs), logger, args.cores)
+            controller.set_batch_jobs(jobs)
+            sampler = ProcCpuSampler(args.pid)
+            if args.mcperf is not None:
+                lines = sys.stdin if args.mcperf == "-" else follow(open(args.mcperf, "r"))
+                sampler = CombinedSampler(McperfSampler(lines, args.max_age), sampler)
+            try:
+                controller.run(sampler, args.interval)
+            except KeyboardInterrupt:
+                pass
+        else:
+            from cca.mcperf import read_mcperf
+
+            controller = CoreController(policy, RecordingActuator(), RecordingActuator(), logger, PART4_CORES)
+            model = LatencyModel.from_store({1: args.one_core, 2: args.two_cores})
+            for (key, value) in replay(controller, read_mcperf(args.trace), model).items():
+                print(f"{key}: {value}")
+    finally:
+        logger.end()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import os
+import random
+import threading
+from datetime import datetime
+
+
+class Journal:
+    """Append-only JSON lines file of finished sweep trials.
+
+    Every trial is written and fsynced as soon as it finishes, so a crashed
+    or interrupted sweep can be restarted and skips everything already in
+    the journal. A trial is identified by its key (e.g. ``(suite,
+    interference)``) and its repetition number.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+
+    def entries(self):
+        if not os.path.exists(self.file_path):
+            return []
+        entries = []
+        with open(self.file_path, "r") as file:
+            lines = file.read().splitlines()
+        for (number, line) in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash while appending leaves at most the last line incomplete
+                if number != len(lines) - 1:
+                    raise
+        return entries
+
+    def completed(self):
+        """``{(key, repetition): result}`` of every recorded trial."""
+        return {(tuple(entry["key"]), entry["repetition"]): entry["result"] for entry in self.entries()}
+
+    def record(self, key, repetition, result):
+        line = json.dumps({"key": list(key), "repetition": repetition, "result": result,
+                           "finished": datetime.now().isoformat(timespec="seconds")})
+        with self.lock:
+            with open(self.file_path, "ab+") as file:
+                self._drop_torn_tail(file)
+                file.write((line + "\n").encode("utf-8"))
+                file.flush()
+                os.fsync(file.fileno())
+
+    @staticmethod
+    def _drop_torn_tail(file):
+        """Cut an incomplete last line left by a crash, so the next record starts on its own line."""
+        size = file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        file.seek(size - 1)
+        if file.read(1) == b"\n":
+            return
+        file.seek(0)
+        data = file.read()
+        file.truncate(data.rfind(b"\n") + 1)
+        file.seek(0, os.SEEK_END)
+
+
+def pending_trials(keys, repetitions=1, completed=(), shuffle=False, seed=None):
+    """``(key, repetition)`` pairs still to run, optionally in random order.
+
+    Shuffling spreads slow drifts of the cluster (noisy neighbours, thermal
+    effects) over all keys instead of biasing the ones measured last.
+    """
+    trials = [(tuple(key), repetition) for repetition in range(repetitions) for key in keys
+              if (tuple(key), repetition) not in completed]
+    if shuffle:
+        random.Random(seed).shuffle(trials)
+    return trials
+
+
+def collect(completed, keys, repetitions=1):
+    """``{key: [result of repetition 0, 1, ...]}`` for keys with all repetitions done."""
+    results = {}
+    for key in keys:
+        values = [completed.get((tuple(key), repetition)) for repetition in range(repetitions)]
+        if all(value is not None for value in values):
+            results[tuple(key)] = values
+    return results
@@ -0,0 +1,218 @@
+import http.client
+import json
+import logging
+import os
+import queue
+import ssl
+import urllib.parse
+
+import yaml
+
+from cca.watch import iter_json_objects
+
+# `kubectl proxy` serves the API on this address with the local credentials
+DEFAULT_SERVER = os.environ.get("KUBE_API_SERVER", "http://127.0.0.1:8001")
+DEFAULT_NAMESPACE = os.environ.get("KUBE_NAMESPACE", "default")
+
+RESOURCES = {
+    "Pod": ("/api/v1", "pods"),
+    "Service": ("/api/v1", "services"),
+    "Job": ("/apis/batch/v1", "jobs"),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, method, path, status, body):
+        message = body.get("message", body) if isinstance(body, dict) else body
+        super().__init__(f"{method} {path} failed with {status}: {message}")
+        self.status = status
+        self.body = body
+
+
+class HttpBackend:
+    """Keep-alive HTTP(S) connections to the API server, reused across calls.
+
+    Any server speaking the Kubernetes REST API works, including
+    ``kubectl proxy`` (the default) or a local fake.
+    """
+
+    def __init__(self, server=DEFAULT_SERVER, token=None, ca_file=None, pool_size=4, timeout=30):
+        url = urllib.parse.urlsplit(server)
+        self.https = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.https else 80)
+        self.timeout = timeout
+        self.headers = {"Accept": "application/json"}
+        if token is None:
+            token = os.environ.get("KUBE_TOKEN")
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.ssl_context = ssl.create_default_context(cafile=ca_file) if self.https else None
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self, timeout):
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            return self._connect(self.timeout)
+
+    def _release(self, connection):
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _send(self, connection, method, path, body, content_type):
+        headers = dict(self.headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = content_type
+        connection.request(method, path, body=payload, headers=headers)
+        return connection.getresponse()
+
+    def request(self, method, path, body=None, content_type="application/json"):
+        """Send one request and return ``(status, decoded body)``."""
+        connection = self._acquire()
+        try:
+            try:
+                response = self._send(connection, method, path, body, content_type)
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # The server dropped an idle keep-alive connection; retry once on a fresh one
+                connection.close()
+                connection = self._connect(self.timeout)
+                response = self._send(connection, method, path, body, content_type)
+            data = response.read()
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection)
+
+        logging.debug(f"API {method} {path} -> {response.status}")
+        if "json" in (response.getheader("Content-Type") or ""):
+            return response.status, json.loads(data)
+        return response.status, data.decode("utf-8", errors="replace")
+
+    def stream(self, path, timeout=None):
+        """Open a long-lived GET (watch, log follow) on its own connection.
+
+        ``timeout`` bounds every read, ``None`` waits forever. Returns the
+        response object; the caller reads it and closes it.
+        """
+        connection = self._connect(timeout)
+        response = self._send(connection, "GET", path, None, None)
+        if response.status >= 400:
+            body = response.read().decode("utf-8", errors="replace")
+            connection.close()
+            raise ApiError("GET", path, response.status, body)
+        return response
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ClusterClient:
+    """Structured access to the few resources the experiment runners use."""
+
+    def __init__(self, backend=None, namespace=DEFAULT_NAMESPACE):
+        self.backend = backend if backend is not None else HttpBackend()
+        self.namespace = namespace
+
+    def path(self, kind, name=None, subresource=None, **params):
+        prefix, plural = RESOURCES[kind]
+        path = f"{prefix}/namespaces/{self.namespace}/{plural}"
+        if name is not None:
+            path += f"/{name}"
+        if subresource is not None:
+            path += f"/{subresource}"
+        params = {k: v for k, v in params.items() if v is not None}
+        if params:
+            path += "?" + urllib.parse.urlencode(params)
+        return path
+
+    def call(self, method, path, body=None, ignore=()):
+        status, data = self.backend.request(method, path, body)
+        if status >= 400 and status not in ignore:
+            raise ApiError(method, path, status, data)
+        return data
+
+    def create(self, manifest):
+        return self.call("POST", self.path(manifest["kind"]), manifest)
+
+    def create_from_file(self, file_path):
+        with open(file_path, "r") as file:
+            return [self.create(manifest) for manifest in yaml.safe_load_all(file) if manifest]
+
+    def get(self, kind, name):
+        return self.call("GET", self.path(kind, name))
+
+    def list(self, kind, label_selector=None):
+        """Return the raw ``<Kind>List`` object, as ``kubectl get -o json`` would."""
+        return self.call("GET", self.path(kind, labelSelector=label_selector))
+
+    def delete(self, kind, name):
+        return self.call("DELETE", self.path(kind, name, propagationPolicy="Background"), ignore=(404,))
+
+    def delete_all(self, kind):
+        return self.call("DELETE", self.path(kind, propagationPolicy="Background"))
+
+    def job_pods(self, job_name):
+        return self.list("Pod", label_selector=f"job-name={job_name}")["items"]
+
+    def logs(self, pod_name):
+        return self.call("GET", self.path("Pod", pod_name, "log"))
+
+    def follow_logs(self, pod_name, timeout=None):
+        """Yield log lines as the container writes them.
+
+        Raises :class:`TimeoutError` if no line arrives for ``timeout`` seconds.
+        """
+        response = self.backend.stream(self.path("Pod", pod_name, "log", follow="true"), timeout)
+        try:
+            for line in response:
+                yield line.decode("utf-8", errors="replace").rstrip("\n")
+        finally:
+            response.close()
+
+    def watch(self, kind, resource_version=None, label_selector=None, field_selector=None, timeout_seconds=None):
+        """Yield ``(event_type, object)`` pairs from the API watch of ``kind``.
+
+        The API server ends the watch after ``timeout_seconds``.
+        """
+        path = self.path(kind, watch="true", resourceVersion=resource_version, labelSelector=label_selector,
+                         fieldSelector=field_selector, timeoutSeconds=timeout_seconds, allowWatchBookmarks="false")
+        response = self.backend.stream(path)
+        try:
+            for event in iter_json_objects(response):
+                yield event["type"], event["object"]
+        finally:
+            response.close()
+
+    def watch_forever(self, kind, label_selector=None, field_selector=None):
+        """:meth:`watch` that is reopened whenever the server ends it, resuming after the last event.
+
+        An ERROR event (usually 410 Gone: the resource version was compacted
+        away) restarts the watch from the current state, which the server
+        replays as ADDED events.
+        """
+        resource_version = None
+        while True:
+            for (event_type, obj) in self.watch(kind, resource_version, label_selector, field_selector):
+                if event_type == "ERROR":
+                    logging.info(f"Watch of {kind} failed, relisting: {obj.get('message', obj)}")
+                    resource_version = None
+                    break
+                resource_version = obj["metadata"]["resourceVersion"]
+                yield event_type, obj
+
+    def close(self):
+        self.backend.close()
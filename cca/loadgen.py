@@ -0,0 +1,152 @@
+import argparse
+import subprocess
+
+from cca.capacity import SLO_US, TOLERANCE
+from cca.mcperf import HEADER_PATTERN, QUERY_TYPES, parse_mcperf
+
+# Same client settings as client_measure.sh
+MCPERF_ARGS = ["--noload", "-T", "16", "-C", "4", "-D", "4", "-Q", "1000", "-c", "4", "-t", "5", "-w", "2"]
+
+
+class Point:
+    """One measured load point: the parsed row and the raw mcperf line it came from."""
+
+    def __init__(self, target, row, line):
+        self.target = target
+        self.qps = float(row["QPS"])
+        self.p95 = float(row["p95"])
+        self.line = line
+
+    def meets(self, slo_us, tolerance=TOLERANCE):
+        return self.p95 <= slo_us and self.qps >= (1 - tolerance) * self.target
+
+
+class McperfClient:
+    """Runs mcperf at one target QPS at a time.
+
+    ``--scan Q:Q:1`` is used instead of ``-q`` so every run prints exactly the
+    header and row format of the fixed scans in client_measure.sh.
+    """
+
+    def __init__(self, server, agent, binary="./mcperf", args=MCPERF_ARGS):
+        self.server = server
+        self.agent = agent
+        self.binary = binary
+        self.args = list(args)
+        self.header = None
+
+    def load(self):
+        subprocess.run([self.binary, "-s", self.server, "--loadonly"], check=True)
+
+    def measure(self, target):
+        command = [self.binary, "-s", self.server, "-a", self.agent] + self.args + ["--scan", f"{target}:{target}:1"]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        header = HEADER_PATTERN.search(output)
+        if header is None:
+            raise RuntimeError(f"mcperf printed no results for {target} QPS: {output[-200:]!r}")
+        self.header = header.group()
+        df = parse_mcperf(output)
+        if len(df) != 1:
+            raise RuntimeError(f"Expected one mcperf row for {target} QPS, got {len(df)}")
+        line = next(line for line in output[header.end():].splitlines() if line.split(" ", 1)[0] in QUERY_TYPES)
+        return Point(target, df.iloc[0], line)
+
+
+class KneeSearch:
+    """Find the highest target QPS that still meets the p95 SLO with few measurements.
+
+    A coarse upward sweep with ``step`` stops at the first point that violates
+    the SLO (or whose achieved QPS falls behind the target), then the interval
+    between the last good and the first bad target is bisected down to
+    ``resolution``. Every measured point is kept, so the written scan is a
+    normal mcperf output that is dense around the knee.
+    """
+
+    def __init__(self, measure, slo_us=SLO_US, low=5000, high=125000, step=20000, resolution=1000,
+                 tolerance=TOLERANCE, log=print):
+        self.measure = measure
+        self.slo_us = slo_us
+        self.low = low
+        self.high = high
+        self.step = step
+        self.resolution = resolution
+        self.tolerance = tolerance
+        self.log = log
+        self.points = {}
+
+    def probe(self, target):
+        if target not in self.points:
+            point = self.measure(target)
+            self.points[target] = point
+            verdict = "ok" if point.meets(self.slo_us, self.tolerance) else "violates"
+            self.log(f"target {target}: QPS {point.qps:.0f}, p95 {point.p95:.0f}us ({verdict})")
+        return self.points[target].meets(self.slo_us, self.tolerance)
+
+    def run(self):
+        """Return ``(last_good, first_bad)`` targets; either is None if the range has no such point."""
+        targets = list(range(self.low, self.high + 1, self.step))
+        if targets[-1] != self.high:
+            targets.append(self.high)
+
+        good, bad = None, None
+        for target in targets:
+            if not self.probe(target):
+                bad = target
+                break
+            good = target
+
+        if good is None or bad is None:
+            return good, bad
+
+        while bad - good > self.resolution:
+            # Prefer round targets, which keeps the output comparable with the fixed scans
+            middle = round((good + bad) / 2 / self.resolution) * self.resolution
+            if not good < middle < bad:
+                middle = (good + bad) // 2
+            if self.probe(middle):
+                good = middle
+            else:
+                bad = middle
+        return good, bad
+
+    def scan_lines(self, header):
+        """The measured points as mcperf output, ordered by target."""
+        return [header] + [self.points[target].line for target in sorted(self.points)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive mcperf scan that searches the p95 SLO knee.")
+    parser.add_argument("-s", "--server", required=True, help="memcached IP")
+    parser.add_argument("-a", "--agent", required=True, help="internal agent IP")
+    parser.add_argument("-o", "--output", required=True, help="file to write in the usual mcperf scan format")
+    parser.add_argument("--mcperf", default="./mcperf", help="mcperf binary")
+    parser.add_argument("--slo", type=float, default=SLO_US, help="p95 SLO in us")
+    parser.add_argument("--low", type=int, default=5000)
+    parser.add_argument("--high", type=int, default=125000)
+    parser.add_argument("--step", type=int, default=20000, help="target QPS step of the coarse sweep")
+    parser.add_argument("--resolution", type=int, default=1000, help="stop bisecting below this QPS gap")
+    parser.add_argument("--skip-load", action="store_true", help="don't run mcperf --loadonly first")
+    args = parser.parse_args(argv)
+
+    client = McperfClient(args.server, args.agent, binary=args.mcperf)
+    if not args.skip_load:
+        client.load()
+    search = KneeSearch(client.measure, slo_us=args.slo, low=args.low, high=args.high, step=args.step,
+                        resolution=args.resolution)
+    good, bad = search.run()
+    if not search.points:
+        parser.error("no load points in the given range")
+
+    with open(args.output, "w") as file:
+        file.write("\n".join(search.scan_lines(client.header)) + "\n")
+
+    if good is None:
+        print(f"Even {args.low} QPS violates the SLO")
+    elif bad is None:
+        print(f"No SLO violation up to {good} QPS")
+    else:
+        print(f"Knee between {good} and {bad} QPS after {len(search.points)} measurements")
+
+
+if __name__ == "__main__":
+    main()
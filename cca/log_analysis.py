@@ -0,0 +1,165 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from scheduler_logger import read_binary_log
+
+CORES_PATTERN = r"^\[([^\]]*)\]"
+
+
+def local_utc_offsets_ms(local_ms):
+    """UTC offset of the local time zone at each naive local time (ms since the epoch as if it were UTC).
+
+    Computed per timestamp, so logs recorded across a DST change aren't
+    shifted by the offset in effect when they are analysed. Offsets are
+    looked up once per minute.
+    """
+    minutes, index = np.unique(np.asarray(local_ms, dtype=np.int64) // 60_000, return_inverse=True)
+    offsets = [
+        datetime.fromtimestamp(minute * 60, timezone.utc).replace(tzinfo=None).astimezone().utcoffset()
+        // timedelta(milliseconds=1)
+        for minute in minutes.tolist()
+    ]
+    return np.array(offsets, dtype=np.int64)[index]
+
+
+def read_log(file_path, utc_offset_ms=None):
+    """Parse a SchedulerLogger text or binary log into an events DataFrame.
+
+    ``ts`` is epoch milliseconds. The logger writes local time, which is
+    shifted by ``utc_offset_ms`` if given (e.g. 0 for logs written in UTC) and
+    otherwise by the local offset in effect at each timestamp. ``cores`` is
+    the number of cores in the core-list argument of start/update_cores
+    events.
+    """
+    if file_path.endswith(".bin"):
+        records = read_binary_log(file_path)
+        events = pd.DataFrame({
+            "timestamp": [r[0] for r in records],
+            "event": [r[1] for r in records],
+            "job": [r[2].value for r in records],
+            "args": [r[3] for r in records],
+        })
+        timestamps = pd.to_datetime(events["timestamp"])
+    else:
+        with open(file_path, "r") as file:
+            lines = pd.Series(file.read().splitlines())
+        events = lines[lines.str.len() > 0].str.split(" ", n=3, expand=True).reindex(columns=range(4))
+        events.columns = ["timestamp", "event", "job", "args"]
+        events["args"] = events["args"].fillna("")
+        timestamps = pd.to_datetime(events["timestamp"], format="ISO8601")
+
+    local_ms = timestamps.to_numpy().astype("datetime64[ms]").astype(np.int64)
+    events["ts"] = local_ms - (local_utc_offsets_ms(local_ms) if utc_offset_ms is None else utc_offset_ms)
+    core_list = events["args"].str.extract(CORES_PATTERN, expand=False)
+    events["cores"] = np.where(core_list.isna(), -1, core_list.fillna("").str.count(",") + (core_list.fillna("") != ""))
+    events["event"] = events["event"].astype("category")
+    events["job"] = events["job"].astype("category")
+    return events[["ts", "event", "job", "cores", "args"]].sort_values("ts", kind="stable").reset_index(drop=True)
+
+
+def _pair(starts, ends, default_end):
+    """Match each start with the first end at or after it."""
+    index = np.searchsorted(ends, starts, side="left")
+    matched = np.append(ends, default_end)[index]
+    return starts, matched
+
+
+def job_intervals(events):
+    """Per job: run, pause and core-allocation intervals as int64 ms arrays."""
+    log_end = int(events["ts"].max())
+    intervals = {}
+    for job, group in events[events["job"] != "scheduler"].groupby("job", observed=True):
+        ts = group["ts"].to_numpy()
+        event = group["event"].to_numpy()
+
+        run_start, run_end = _pair(ts[event == "start"], ts[event == "end"], log_end)
+        pause_start, pause_end = _pair(ts[event == "pause"], ts[event == "unpause"], log_end)
+
+        allocation = (event == "start") | (event == "update_cores")
+        segment_start = ts[allocation]
+        segment_cores = group["cores"].to_numpy()[allocation]
+        # A core allocation lasts until the next one or the end of the job's last run
+        job_end = run_end.max() if len(run_end) else log_end
+        segment_end = np.append(segment_start[1:], job_end)
+
+        intervals[job] = {
+            "run": np.column_stack([run_start, run_end]),
+            "pause": np.column_stack([pause_start, pause_end]),
+            "cores": np.column_stack([segment_start, segment_end, segment_cores]),
+        }
+    return intervals
+
+
+def overlap_counts(starts, ends, window_start, window_end, weights=None):
+    """For each interval, count (or sum ``weights`` of) the windows it overlaps.
+
+    Windows must be sorted and non-overlapping, as mcperf windows are.
+    """
+    lo = np.searchsorted(window_end, starts, side="right")
+    hi = np.searchsorted(window_start, ends, side="left")
+    weights = np.ones(len(window_start), dtype=np.int64) if weights is None else weights
+    cumulative = np.concatenate([[0], np.cumsum(weights)])
+    return cumulative[np.maximum(hi, lo)] - cumulative[lo]
+
+
+def report(events, mcperf=None, slo_us=1000):
+    """Runtime, core-seconds, paused time and SLO-violation windows per job."""
+    intervals = job_intervals(events)
+    if mcperf is not None:
+        mcperf = mcperf.sort_values("ts_start")
+        window_start = mcperf["ts_start"].to_numpy()
+        window_end = mcperf["ts_end"].to_numpy()
+        violation = (mcperf["p95"].to_numpy() > slo_us).astype(np.int64)
+
+    rows = []
+    for job, parts in intervals.items():
+        run, pause, cores = parts["run"], parts["pause"], parts["cores"]
+        paused = np.clip(pause[:, 1] - pause[:, 0], 0, None)
+        segment_cores = np.clip(cores[:, 2], 0, None)
+        # Cores held while paused are not used
+        paused_cores = segment_cores[np.clip(np.searchsorted(cores[:, 0], pause[:, 0], side="right") - 1, 0, None)] \
+            if len(cores) else np.zeros(len(pause))
+        row = {
+            "job": job,
+            "runtime_s": (run[:, 1] - run[:, 0]).sum() / 1000,
+            "paused_s": paused.sum() / 1000,
+            "core_seconds": ((cores[:, 1] - cores[:, 0]) * segment_cores).sum() / 1000 - (paused * paused_cores).sum() / 1000,
+        }
+        if mcperf is not None:
+            row["windows"] = int(overlap_counts(run[:, 0], run[:, 1], window_start, window_end).sum())
+            row["slo_violations"] = int(overlap_counts(run[:, 0], run[:, 1], window_start, window_end, violation).sum())
+            row["violation_ratio"] = row["slo_violations"] / row["windows"] if row["windows"] else 0.0
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def violation_windows(mcperf, slo_us=1000):
+    """mcperf windows whose p95 is above the SLO."""
+    return mcperf.loc[mcperf["p95"] > slo_us, ["ts_start", "ts_end", "p95", "QPS", "target"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-job report from a SchedulerLogger log and mcperf output.")
+    parser.add_argument("log", help="log{date}.txt or log{date}.bin")
+    parser.add_argument("mcperf", nargs="?", help="mcperf output with ts_start/ts_end columns")
+    parser.add_argument("--slo", type=float, default=1000, help="p95 SLO in us (default 1000)")
+    parser.add_argument("--utc-offset-ms", type=int, default=None, help="fixed offset of the log's local time to UTC (default: the local time zone at each timestamp)")
+    args = parser.parse_args(argv)
+
+    events = read_log(args.log, args.utc_offset_ms)
+    mcperf = None
+    if args.mcperf:
+        from cca.mcperf import read_mcperf
+
+        mcperf = read_mcperf(args.mcperf)
+    print(report(events, mcperf, args.slo).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if mcperf is not None:
+        violations = violation_windows(mcperf, args.slo)
+        print(f"SLO violations: {len(violations)} of {len(mcperf)} windows ({len(violations) / max(len(mcperf), 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
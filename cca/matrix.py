@@ -0,0 +1,143 @@
+import copy
+import re
+import threading
+from concurrent.futures import FIRST_EXCEPTION, CancelledError, ThreadPoolExecutor, wait
+from typing import NamedTuple, Optional
+
+# These interferences saturate resources shared by every core of a node, so a
+# cell using them must not share its node with any other cell.
+NODE_WIDE_INTERFERENCES = {"llc", "membw"}
+
+TASKSET_PATTERN = re.compile(r"taskset -c [\d,\-]+")
+
+
+class Cell(NamedTuple):
+    suite: str
+    interference: str
+    repetition: int = 0
+
+    @property
+    def name(self):
+        # Repetitions of a cell may run at the same time, so they need distinct object names
+        suffix = f"-r{self.repetition}" if self.repetition else ""
+        return f"{self.suite}-{self.interference}{suffix}"
+
+
+class Slot(NamedTuple):
+    """Where a cell runs: a node (hostname) and optionally a cpuset on it.
+
+    ``node=None`` keeps the node selectors of the manifests unchanged.
+    """
+    node: Optional[str] = None
+    cpus: Optional[str] = None
+
+
+def parse_slots(spec):
+    """Parse ``"node-a,node-b:0-1,node-b:2-3"`` into slots."""
+    slots = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        node, _, cpus = item.partition(":")
+        slots.append(Slot(node, cpus or None))
+    return slots
+
+
+def place(manifest, slot, suffix):
+    """Copy a Pod/Job manifest, renamed with ``suffix`` and pinned to ``slot``."""
+    manifest = copy.deepcopy(manifest)
+    name = f"{manifest['metadata']['name']}-{suffix}"
+    manifest["metadata"]["name"] = name
+    manifest["metadata"].setdefault("labels", {})["name"] = name
+
+    pod_spec = manifest["spec"]["template"]["spec"] if manifest["kind"] == "Job" else manifest["spec"]
+    if slot.node is not None:
+        pod_spec["nodeSelector"] = {"kubernetes.io/hostname": slot.node}
+    if slot.cpus is not None:
+        pinned = False
+        for container in pod_spec["containers"]:
+            args = container.get("args", [])
+            pinned = pinned or any(TASKSET_PATTERN.search(arg) for arg in args)
+            container["args"] = [TASKSET_PATTERN.sub(f"taskset -c {slot.cpus}", arg) for arg in args]
+        if not pinned:
+            raise ValueError(f"Can't pin {name} to cpus {slot.cpus}: its manifest has no taskset -c argument")
+    return manifest
+
+
+class MatrixRunner:
+    """Runs independent cells concurrently, at most one cell per node.
+
+    Every cell reserves all slots of its node: cells on other cores of the
+    same node would still share its LLC and memory bandwidth (and L1/L2 with
+    SMT siblings), so slowdowns measured next to another cell aren't
+    comparable to the sequential baseline. Cells therefore only run in
+    parallel across nodes; a slot's cpuset just pins the cell.
+    ``run_cell(cell, slot)`` does the work and returns the cell's result.
+    After the first failure no further cell starts; the cells already
+    running finish.
+    """
+
+    def __init__(self, slots, run_cell, max_concurrency=None):
+        if not slots:
+            raise ValueError("MatrixRunner needs at least one slot")
+        self.slots = list(slots)
+        self.run_cell = run_cell
+        nodes = len({slot.node for slot in self.slots})
+        self.max_concurrency = min(max_concurrency or nodes, nodes)
+        self.busy = set()
+        self.failure = None
+        self.condition = threading.Condition()
+
+    def _node_slots(self, slot):
+        return [s for s in self.slots if s.node == slot.node]
+
+    def _acquire(self, cell):
+        with self.condition:
+            while True:
+                if self.failure is not None:
+                    raise CancelledError(f"{cell.name} cancelled after a failed cell")
+                slot = self._free_slot()
+                if slot is not None:
+                    reserved = self._node_slots(slot)
+                    self.busy.update(reserved)
+                    return slot, reserved
+                self.condition.wait()
+
+    def _free_slot(self):
+        for slot in self.slots:
+            if not any(s in self.busy for s in self._node_slots(slot)):
+                return slot
+        return None
+
+    def _release(self, reserved):
+        with self.condition:
+            self.busy.difference_update(reserved)
+            self.condition.notify_all()
+
+    def _run(self, cell):
+        slot, reserved = self._acquire(cell)
+        try:
+            return self.run_cell(cell, slot)
+        except BaseException as e:
+            with self.condition:
+                if self.failure is None:
+                    self.failure = e
+            raise
+        finally:
+            self._release(reserved)
+
+    def run(self, cells):
+        """Run all cells and return ``{cell: result}``; re-raises the first failure."""
+        cells = list(cells)
+        self.failure = None
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {cell: executor.submit(self._run, cell) for cell in cells}
+            wait(futures.values(), return_when=FIRST_EXCEPTION)
+            if self.failure is not None:
+                # Queued cells never start; cells waiting for a slot give up in _acquire
+                for future in futures.values():
+                    future.cancel()
+        if self.failure is not None:
+            raise self.failure
+        return {cell: future.result() for (cell, future) in futures.items()}
@@ -0,0 +1,57 @@
+import io
+import re
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = [5, 10, 50, 67, 75, 80, 85, 90, 95, 99, 999, 9999]
+LATENCY_COLUMNS = ["avg", "std", "min"] + [f"p{p}" for p in PERCENTILES]
+QUERY_TYPES = ["read", "update", "get", "set"]
+
+COLUMN_TYPES = {column: np.float32 for column in LATENCY_COLUMNS}
+COLUMN_TYPES["QPS"] = np.float32
+COLUMN_TYPES["target"] = np.int64
+COLUMN_TYPES["ts_start"] = np.int64
+COLUMN_TYPES["ts_end"] = np.int64
+
+HEADER_PATTERN = re.compile(r"^#type\b.*$", re.M)
+# Rows end at the first line that does not start with a query type, e.g. the
+# "Warning! Detected max cpu usage" and "CPU Usage Stats" trailer.
+TRAILER_PATTERN = re.compile(r"^(?!(?:" + "|".join(QUERY_TYPES) + r")\s).+$", re.M)
+
+
+def parse_header(line):
+    columns = line.lstrip("#").split()
+    unknown = [c for c in columns if c != "type" and c not in COLUMN_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown mcperf columns: {unknown}")
+    return columns
+
+
+def parse_mcperf(text, columns=None):
+    """Parse mcperf output into a typed DataFrame (one row per scan step).
+
+    The header is detected from the text. Pass ``columns`` when parsing a
+    chunk that does not contain it.
+    """
+    if columns is None:
+        header = HEADER_PATTERN.search(text)
+        if header is None:
+            raise ValueError("mcperf output has no '#type' header")
+        columns = parse_header(header.group())
+        text = text[header.end() + 1:]
+
+    trailer = TRAILER_PATTERN.search(text)
+    if trailer is not None:
+        text = text[:trailer.start()]
+
+    dtypes = {c: COLUMN_TYPES.get(c, "category") for c in columns}
+    if not text.strip():
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in dtypes.items()})
+
+    return pd.read_csv(io.StringIO(text), sep=r"\s+", header=None, names=columns, dtype=dtypes, engine="c")
+
+
+def read_mcperf(file_path):
+    with open(file_path, "r") as file:
+        return parse_mcperf(file.read())
@@ -0,0 +1,170 @@
+import os
+import re
+
+from cca.store import REPO_ROOT
+
+SUITES = ["blackscholes", "canneal", "dedup", "ferret", "freqmine", "radix", "vips"]
+INTERFERENCES = ["none", "cpu", "l1d", "l1i", "l2", "llc", "membw"]
+
+PART2A_RESULTS = os.path.join(REPO_ROOT, "part2a", "result.txt")
+PART2B_RESULTS = os.path.join(REPO_ROOT, "part2b", "results.txt")
+
+DURATION_PATTERN = re.compile(r"(\d+)m(\d+(?:\.\d+)?)s")
+RESULT_LINE_PATTERN = re.compile(r"^(\w+): (.*)$")
+THREADS_PATTERN = re.compile(r"^N=(\d+)$")
+# Thread count argument of the PARSEC run command in the job manifests
+THREAD_ARG_PATTERN = re.compile(r"-n (\d+)")
+TIME_FIELDS = ["real", "user", "sys"]
+TIME_PATTERNS = {field: re.compile(rf"\b{field}\s+(\d+m\d+(?:\.\d+)?s)") for field in TIME_FIELDS}
+CPU_TIMES_LINE_PATTERN = re.compile(r"^(\w+): real (\S+) user (\S+) sys (\S+)$")
+# splash2x radix only runs with a power of two threads
+POWER_OF_TWO_SUITES = {"radix"}
+
+
+def duration_to_seconds(duration_str):
+    """Convert `time` output such as ``1m13.910s`` to seconds."""
+    match = DURATION_PATTERN.fullmatch(duration_str.strip())
+    if match is None:
+        raise ValueError(f"Not a duration: {duration_str!r}")
+    return int(match[1]) * 60 + float(match[2])
+
+
+class TimeParser:
+    """Collects the ``real``/``user``/``sys`` lines of ``time`` output from log lines as they arrive."""
+
+    def __init__(self):
+        self.times = {}
+
+    @property
+    def done(self):
+        return len(self.times) == len(TIME_FIELDS)
+
+    def feed(self, line):
+        """Scan one log line; returns True once all three durations were seen."""
+        for field, pattern in TIME_PATTERNS.items():
+            if field not in self.times:
+                match = pattern.search(line)
+                if match is not None:
+                    self.times[field] = match[1]
+        return self.done
+
+
+def parse_time_output(logs):
+    """The ``real``/``user``/``sys`` durations printed by ``time`` in a job log, as strings."""
+    parser = TimeParser()
+    for line in logs.splitlines():
+        if parser.feed(line):
+            return parser.times
+    missing = [field for field in TIME_FIELDS if field not in parser.times]
+    raise ValueError(f"No {'/'.join(missing)} time in the job log")
+
+
+def format_cpu_times(suite, times):
+    """Result line read back by :func:`load_cpu_times`."""
+    return f"{suite}: real {times['real']} user {times['user']} sys {times['sys']}"
+
+
+def format_thread_results(threads, times):
+    """An ``N=<threads>`` section of part2b/results.txt from ``{suite: {"real", "user", "sys"}}``.
+
+    :func:`load_thread_runtimes` reads its RESULTS and :func:`load_cpu_times`
+    its CPU TIMES lines.
+    """
+    lines = [f"N={threads}", "RESULTS"]
+    lines += [f"{suite}: {t['real']}" for (suite, t) in times.items()]
+    lines += ["CPU TIMES"] + [format_cpu_times(suite, t) for (suite, t) in times.items()]
+    return "\n".join(lines)
+
+
+def manifest_threads(manifest):
+    """The ``-n`` thread count a PARSEC Job manifest runs with (None if it has none)."""
+    for container in manifest["spec"]["template"]["spec"]["containers"]:
+        for arg in container.get("args", []):
+            match = THREAD_ARG_PATTERN.search(arg)
+            if match is not None:
+                return int(match[1])
+    return None
+
+
+def job_name(suite):
+    return f"parsec-{suite}"
+
+
+def suite_name(job):
+    return job.removeprefix("parsec-")
+
+
+def valid_threads(suite, threads):
+    return threads >= 1 and (suite not in POWER_OF_TWO_SUITES or threads & (threads - 1) == 0)
+
+
+def load_thread_runtimes(file_path=PART2B_RESULTS):
+    """Parse the part2b ``N=<threads>`` sections into ``{suite: {threads: seconds}}``."""
+    runtimes = {}
+    threads = None
+    with open(file_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            threads_match = THREADS_PATTERN.match(line)
+            if threads_match is not None:
+                threads = int(threads_match[1])
+                continue
+            match = RESULT_LINE_PATTERN.match(line)
+            if match is not None and threads is not None and DURATION_PATTERN.fullmatch(match[2]):
+                runtimes.setdefault(match[1], {})[threads] = duration_to_seconds(match[2])
+    return runtimes
+
+
+def load_cpu_times(file_path=PART2B_RESULTS):
+    """Parse the part2b ``CPU TIMES`` lines into ``{suite: {threads: {"real": s, "user": s, "sys": s}}}``."""
+    cpu_times = {}
+    threads = None
+    with open(file_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            threads_match = THREADS_PATTERN.match(line)
+            if threads_match is not None:
+                threads = int(threads_match[1])
+                continue
+            match = CPU_TIMES_LINE_PATTERN.match(line)
+            if match is not None and threads is not None:
+                cpu_times.setdefault(match[1], {})[threads] = {
+                    field: duration_to_seconds(value) for (field, value) in zip(TIME_FIELDS, match.groups()[1:])
+                }
+    return cpu_times
+
+
+def load_interference_runtimes(file_path=PART2A_RESULTS):
+    """Parse the first part2a ``RAW RESULTS`` block into ``{suite: {interference: seconds}}``."""
+    runtimes = {}
+    in_block = False
+    with open(file_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if line == "RAW RESULTS":
+                if runtimes:
+                    break
+                in_block = True
+                continue
+            if not in_block:
+                continue
+            match = RESULT_LINE_PATTERN.match(line)
+            if match is None:
+                if runtimes:
+                    break
+                continue
+            durations = DURATION_PATTERN.findall(match[2])
+            if durations:
+                runtimes[match[1]] = {
+                    interference: int(minutes) * 60 + float(seconds)
+                    for (interference, (minutes, seconds)) in zip(INTERFERENCES, durations)
+                }
+    return runtimes
+
+
+def load_interference_slowdowns(file_path=PART2A_RESULTS):
+    """Runtime under each ibench interference relative to ``none``."""
+    return {
+        suite: {interference: seconds / values["none"] for (interference, seconds) in values.items()}
+        for (suite, values) in load_interference_runtimes(file_path).items()
+    }
@@ -0,0 +1,22 @@
+import hashlib
+import os
+
+# Standard library only, so that commands like ``cca times`` can locate cached
+# results without importing numpy or pandas through cca.store.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_ROOT = os.path.join(REPO_ROOT, "result_store")
+TIMELINE_CACHE = os.path.join(STORE_ROOT, "pod_timelines")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def timeline_cache_path(file_path, cache_dir=TIMELINE_CACHE):
+    """Where the timeline of a pod dump is cached, keyed by the sha256 of the dump."""
+    return os.path.join(cache_dir, f"{file_hash(file_path)}.json")
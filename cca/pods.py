@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cca.paths import TIMELINE_CACHE, timeline_cache_path
+from cca.watch import container_runs, iter_items
+
+def to_epoch_ms(timestamps):
+    """Kubernetes RFC 3339 UTC timestamps (``...Z``) to int64 epoch ms; missing ones become -1."""
+    values = np.array([t.rstrip("Z") if t else "NaT" for t in timestamps], dtype="datetime64[ms]")
+    result = values.astype(np.int64)
+    result[np.isnat(values)] = -1
+    return result
+
+
+def pod_timelines(pods):
+    """One row per container of a ``kubectl get pods -o json`` dump.
+
+    ``pods`` is the decoded dump or any iterable of its items. Columns:
+    ``job`` (container name), ``node`` (node type label, or node name),
+    ``start_ms``/``end_ms`` (epoch ms, -1 while not terminated) and
+    ``completed``.
+    """
+    items = pods["items"] if isinstance(pods, dict) else pods
+    runs = list(container_runs(items))
+    jobs = [run[0] for run in runs]
+    nodes = [run[1] for run in runs]
+    starts = [run[2] for run in runs]
+    ends = [run[3] for run in runs]
+
+    timeline = pd.DataFrame({
+        "job": jobs,
+        "node": nodes,
+        "start_ms": to_epoch_ms(starts),
+        "end_ms": to_epoch_ms(ends),
+    })
+    timeline["completed"] = (timeline["start_ms"] >= 0) & (timeline["end_ms"] >= 0)
+    return timeline
+
+
+def read_pod_timelines(file_path):
+    with open(file_path, "r") as file:
+        return pod_timelines(iter_items(file))
+
+
+def cached_pod_timelines(file_path, cache_dir=TIMELINE_CACHE):
+    """Timeline of a pod dump, cached under the sha256 of the file."""
+    cache_path = timeline_cache_path(file_path, cache_dir)
+    if os.path.exists(cache_path):
+        return pd.read_json(cache_path, orient="split", dtype={"start_ms": np.int64, "end_ms": np.int64})
+
+    timeline = read_pod_timelines(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    timeline.to_json(tmp_path, orient="split", index=False)
+    os.replace(tmp_path, cache_path)
+    return timeline
+
+
+def load_pod_timelines(file_paths, cache_dir=TIMELINE_CACHE, workers=None):
+    """Timelines of many pod dumps, extracted in parallel; returns ``{path: DataFrame}``."""
+    file_paths = list(file_paths)
+    if len(file_paths) <= 1:
+        return {path: cached_pod_timelines(path, cache_dir) for path in file_paths}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        timelines = executor.map(cached_pod_timelines, file_paths, [cache_dir] * len(file_paths))
+        return dict(zip(file_paths, timelines))
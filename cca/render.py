@@ -0,0 +1,120 @@
+import hashlib
+import inspect
+import os
+import pickle
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cca.store import REPO_ROOT, STORE_ROOT
+from cca.transform import load_manifest, save_manifest
+
+FIGURE_MANIFEST = os.path.join(STORE_ROOT, ".figures.json")
+PREVIEW_DPI = 72
+
+# draw(data, **params) must be a module level function returning a matplotlib Figure
+FigureJob = namedtuple("FigureJob", ["output", "draw", "data", "params"])
+
+
+def _update_hash(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.columns), list(value.dtypes.astype(str)))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(repr((value.name, str(value.dtype))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _update_hash(digest, value[key])
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _update_hash(digest, item)
+        digest.update(b"]")
+    else:
+        digest.update(pickle.dumps(value))
+
+
+def figure_key(job, preview=False):
+    """Hash of the drawing code, its input data and its parameters."""
+    digest = hashlib.sha256()
+    digest.update(f"{job.draw.__module__}.{job.draw.__qualname__}".encode())
+    digest.update(inspect.getsource(job.draw).encode())
+    _update_hash(digest, job.data)
+    _update_hash(digest, job.params)
+    digest.update(b"preview" if preview else b"final")
+    return digest.hexdigest()
+
+
+def output_path(job, preview=False):
+    if preview:
+        # Not plain .png, which may be a tracked figure (part1/plots/part1.png)
+        return os.path.splitext(job.output)[0] + ".preview.png"
+    return job.output
+
+
+def _use_headless_backend():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_figure(job, preview=False):
+    path = output_path(job, preview)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig = job.draw(job.data, **job.params)
+    if preview:
+        fig.savefig(path, dpi=PREVIEW_DPI)
+    else:
+        fig.savefig(path)
+    return path
+
+
+def render(jobs, workers=None, preview=False, force=False, manifest_path=FIGURE_MANIFEST):
+    """Render all figures whose code, data or parameters changed in a process pool.
+
+    ``preview`` writes a low resolution PNG next to where the PDF would go
+    instead of the PDF itself. Both are tracked separately in the manifest.
+    """
+    manifest = load_manifest(manifest_path)
+    pending = []
+    for job in jobs:
+        path = os.path.abspath(output_path(job, preview))
+        name = os.path.relpath(path, REPO_ROOT)
+        key = figure_key(job, preview)
+        if not force and manifest.get(name) == key and os.path.exists(path):
+            continue
+        pending.append((job, name, key))
+
+    if len(pending) == 1:
+        _use_headless_backend()
+        render_figure(pending[0][0], preview)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_use_headless_backend) as executor:
+            futures = [executor.submit(render_figure, job, preview) for (job, _, _) in pending]
+            for future in futures:
+                future.result()
+
+    if pending:
+        for (_, name, key) in pending:
+            manifest[name] = key
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        save_manifest(manifest_path, manifest)
+
+    print(f"Rendered {len(pending)} of {len(jobs)} figures ({len(jobs) - len(pending)} unchanged)")
+    return [name for (_, name, _) in pending]
+
+
+def add_render_arguments(parser):
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--preview", action="store_true", help="write quick low resolution PNGs instead of the PDFs")
+    parser.add_argument("--force", action="store_true", help="render even if nothing changed")
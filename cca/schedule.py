@@ -0,0 +1,355 @@
+import argparse
+import copy
+import json
+import math
+import random
+from typing import NamedTuple
+
+from cca.colocation import ColocationModel
+from cca.matrix import TASKSET_PATTERN
+from cca.parsec import (SUITES, THREAD_ARG_PATTERN, job_name, load_thread_runtimes, manifest_threads, suite_name,
+                        valid_threads)
+from cca.sensitivity import RESOURCES, load_matrix
+
+
+class Node(NamedTuple):
+    name: str
+    cores: int
+    reserved: tuple = ()
+
+    @property
+    def usable_cores(self):
+        return [c for c in range(self.cores) if c not in self.reserved]
+
+
+NODE_LABEL = "cca-project-nodetype"
+
+# The part3 cluster; memcached is pinned to core 0 of node-a
+PART3_NODES = [
+    Node("node-a-2core", 2, (0,)),
+    Node("node-b-4core", 4),
+    Node("node-c-8core", 8),
+]
+
+
+class Placement(NamedTuple):
+    job: str
+    node: str
+    cores: tuple
+    threads: int
+    start: float
+    end: float
+    after: tuple
+
+
+def apply_placement(manifest, placement):
+    """Copy a PARSEC Job manifest pinned to the placement's node, cores and threads."""
+    if not valid_threads(suite_name(placement.job), placement.threads):
+        raise ValueError(f"{placement.job} can't run with {placement.threads} threads")
+    manifest = copy.deepcopy(manifest)
+    pod_spec = manifest["spec"]["template"]["spec"]
+    pod_spec["nodeSelector"] = {NODE_LABEL: placement.node}
+    cores = ",".join(str(c) for c in placement.cores)
+    for container in pod_spec["containers"]:
+        container["args"] = [
+            THREAD_ARG_PATTERN.sub(f"-n {placement.threads}", TASKSET_PATTERN.sub(f"taskset -c {cores}", arg))
+            for arg in container.get("args", [])
+        ]
+    return manifest
+
+
+def manifest_placement(manifest, after=()):
+    """Read the node, cores and thread count a PARSEC Job manifest is pinned to into a Placement."""
+    pod_spec = manifest["spec"]["template"]["spec"]
+    cores = ()
+    for container in pod_spec["containers"]:
+        for arg in container.get("args", []):
+            match = TASKSET_PATTERN.search(arg)
+            if match is not None:
+                cores = tuple(parse_cpus(match.group().split()[-1]))
+    threads = manifest_threads(manifest)
+    return Placement(manifest["metadata"]["name"], pod_spec["nodeSelector"][NODE_LABEL], cores,
+                     threads or len(cores), 0.0, 0.0, tuple(after))
+
+
+def parse_cpus(cpus):
+    """Expand a cpuset like ``0,2-3`` into ``[0, 2, 3]``."""
+    result = []
+    for part in cpus.split(","):
+        first, _, last = part.partition("-")
+        result.extend(range(int(first), int(last or first) + 1))
+    return result
+
+
+class RuntimeModel:
+    """Runtime of a PARSEC job for a thread count, from the part2b measurements.
+
+    Thread counts between measurements are interpolated linearly in log2(threads);
+    beyond the largest measurement the runtime stays flat.
+    """
+
+    def __init__(self, thread_runtimes):
+        self.thread_runtimes = {suite: sorted(values.items()) for (suite, values) in thread_runtimes.items()}
+
+    def __call__(self, job, threads):
+        points = self.thread_runtimes[suite_name(job)]
+        if threads <= points[0][0]:
+            return points[0][1]
+        for (t0, r0), (t1, r1) in zip(points, points[1:]):
+            if threads <= t1:
+                w = (math.log2(threads) - math.log2(t0)) / (math.log2(t1) - math.log2(t0))
+                return r0 + w * (r1 - r0)
+        return points[-1][1]
+
+
+def colocation_penalties(matrix):
+    """Mean slowdown over the ibench interferences minus one, per PARSEC job of a sensitivity matrix."""
+    return {job_name(suite): float(row.mean() - 1) for (suite, row) in matrix[RESOURCES].iterrows() if suite in SUITES}
+
+
+class Plan:
+    def __init__(self, placements):
+        self.placements = placements
+
+    @property
+    def makespan(self):
+        return max((p.end for p in self.placements.values()), default=0.0)
+
+    @property
+    def start_jobs(self):
+        return [job for (job, p) in self.placements.items() if not p.after]
+
+    @property
+    def after(self):
+        return {job: list(p.after) for (job, p) in self.placements.items() if p.after}
+
+    def to_dict(self):
+        return {
+            "makespan": self.makespan,
+            "placements": {
+                job: {"node": p.node, "cores": list(p.cores), "threads": p.threads, "start": p.start, "end": p.end,
+                      "after": list(p.after)}
+                for (job, p) in self.placements.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({
+            # Plans written before the thread count was stored ran one thread per core
+            job: Placement(job, p["node"], tuple(p["cores"]), p.get("threads", len(p["cores"])), p["start"], p["end"],
+                           tuple(p["after"]))
+            for (job, p) in data["placements"].items()
+        })
+
+    def save(self, file_path):
+        with open(file_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, "r") as file:
+            return cls.from_dict(json.load(file))
+
+    def describe(self):
+        lines = [f"{'job':<22}{'node':<15}{'cores':<18}{'threads':>8}{'start':>8}{'end':>8}  after"]
+        for p in sorted(self.placements.values(), key=lambda p: (p.node, p.start)):
+            cores = ",".join(str(c) for c in p.cores)
+            lines.append(f"{p.job:<22}{p.node:<15}{cores:<18}{p.threads:>8}{p.start:>8.1f}{p.end:>8.1f}  {','.join(p.after)}")
+        lines.append(f"makespan: {self.makespan:.1f}s")
+        return "\n".join(lines)
+
+
+class DagScheduler:
+    """List scheduling of moldable jobs on cores, improved by local search.
+
+    ``runtime(job, threads)`` gives the isolated runtime, ``penalties[job]``
+    the relative slowdown when the job shares its node, scaled by
+    ``colocation_weight``. ``predecessors`` maps a job to the jobs that must
+    finish before it starts. Each job runs with one thread per core, and
+    only with thread counts it supports (powers of two for radix).
+
+    The greedy placement estimates start and end times to pick nodes and
+    cores; the resulting plan is then timed by replaying it through the
+    same :class:`cca.colocation.ColocationModel` the simulator uses, so
+    ``cca.schedule`` and ``cca.simulate`` agree on every plan.
+    """
+
+    def __init__(self, jobs, nodes, runtime, penalties=None, predecessors=None, colocation_weight=0.5):
+        self.jobs = list(jobs)
+        self.nodes = list(nodes)
+        self.runtime = runtime
+        self.model = ColocationModel(self.nodes, runtime, penalties, colocation_weight)
+        self.predecessors = {job: list((predecessors or {}).get(job, [])) for job in self.jobs}
+        self.options = [(node, threads) for node in self.nodes for threads in range(1, len(node.usable_cores) + 1)]
+
+    def allowed(self, job, option):
+        return valid_threads(suite_name(job), option[1])
+
+    def job_options(self, job):
+        return [option for option in self.options if self.allowed(job, option)]
+
+    def priority_order(self):
+        """Jobs by decreasing critical-path length (a topological order)."""
+        successors = {job: [] for job in self.jobs}
+        for (job, preds) in self.predecessors.items():
+            for pred in preds:
+                successors[pred].append(job)
+
+        rank = {}
+
+        def upward_rank(job):
+            if job not in rank:
+                fastest = min(self.runtime(job, threads) for (_, threads) in self.job_options(job))
+                rank[job] = fastest + max((upward_rank(s) for s in successors[job]), default=0.0)
+            return rank[job]
+
+        return sorted(self.jobs, key=lambda job: -upward_rank(job))
+
+    def _place(self, job, node, threads, ready, core_free, running):
+        cores = sorted(node.usable_cores, key=lambda c: (core_free[node.name][c], c))[:threads]
+        start = max([ready] + [core_free[node.name][c] for c in cores])
+        runtime = self.model.isolated_runtime(job, threads, len(cores))
+        # Colocated if another job's interval overlaps this one (taken without the
+        # slowdown: if it doesn't overlap, the job runs alone and isn't slowed)
+        shared = any(s < start + runtime and e > start for (s, e) in running[node.name])
+        end = start + runtime * self.model.factor(job, node.name, shared)
+        return tuple(sorted(cores)), start, end
+
+    def list_schedule(self, order, fixed=None):
+        """Place jobs in ``order``; ``fixed`` pins jobs to a (node, threads) choice."""
+        core_free = {node.name: {c: 0.0 for c in node.usable_cores} for node in self.nodes}
+        core_owner = {node.name: {} for node in self.nodes}
+        running = {node.name: [] for node in self.nodes}
+        placements = {}
+
+        for job in order:
+            ready = max((placements[p].end for p in self.predecessors[job]), default=0.0)
+            options = [fixed[job]] if fixed and job in fixed else self.job_options(job)
+            best = None
+            for (node, threads) in options:
+                cores, start, end = self._place(job, node, threads, ready, core_free, running)
+                if best is None or (end, threads) < (best[3], best[1]):
+                    best = (node, threads, cores, end, start)
+            node, threads, cores, end, start = best
+
+            # The job waits for whoever last held its cores and for its predecessors
+            blockers = {core_owner[node.name][c] for c in cores if c in core_owner[node.name]}
+            blockers.update(self.predecessors[job])
+            after = tuple(sorted(blockers))
+
+            for c in cores:
+                core_free[node.name][c] = end
+                core_owner[node.name][c] = job
+            running[node.name].append((start, end))
+            placements[job] = Placement(job, node.name, cores, threads, start, end, after)
+
+        # The estimates above miss jobs placed later that overlap earlier ones
+        start, end, _ = self.model.replay(placements)
+        return Plan({job: p._replace(start=start[job], end=end[job]) for (job, p) in placements.items()})
+
+    def _choices(self, plan):
+        nodes = {node.name: node for node in self.nodes}
+        return {job: (nodes[p.node], p.threads) for (job, p) in plan.placements.items()}
+
+    def _is_topological(self, order):
+        position = {job: i for (i, job) in enumerate(order)}
+        return all(position[p] < position[job] for (job, preds) in self.predecessors.items() for p in preds)
+
+    def hill_climb(self, order, choices, max_rounds=20):
+        """Improve a schedule until no single move shortens the makespan.
+
+        Moves are: giving one job another (node, threads) option, exchanging
+        the options of two jobs, and swapping two jobs in the order.
+        """
+        best = self.list_schedule(order, choices)
+        for _ in range(max_rounds):
+            improved = False
+            candidates = []
+            for job in self.jobs:
+                candidates += [(order, {**choices, job: option}) for option in self.job_options(job) if option != choices[job]]
+            for i, a in enumerate(self.jobs):
+                for b in self.jobs[i + 1:]:
+                    if choices[a] != choices[b] and self.allowed(a, choices[b]) and self.allowed(b, choices[a]):
+                        candidates.append((order, {**choices, a: choices[b], b: choices[a]}))
+            for i in range(len(order)):
+                for j in range(i + 1, len(order)):
+                    swapped = list(order)
+                    swapped[i], swapped[j] = swapped[j], swapped[i]
+                    if self._is_topological(swapped):
+                        candidates.append((swapped, choices))
+
+            for (candidate_order, candidate_choices) in candidates:
+                candidate = self.list_schedule(candidate_order, candidate_choices)
+                if candidate.makespan < best.makespan - 1e-9:
+                    best, order, choices, improved = candidate, candidate_order, candidate_choices, True
+                    break
+            if not improved:
+                break
+        return best, order, choices
+
+    def schedule(self, max_rounds=20, restarts=30, seed=0):
+        """Greedy list schedule improved by iterated local search.
+
+        After the first hill climb, each restart perturbs the best solution
+        (two random placements and a random topological reordering) and
+        climbs again. ``seed`` makes the result reproducible.
+        """
+        rng = random.Random(seed)
+        order = self.priority_order()
+        greedy = self.list_schedule(order)
+        best, best_order, best_choices = self.hill_climb(order, self._choices(greedy), max_rounds)
+
+        for _ in range(restarts):
+            choices = dict(best_choices)
+            for job in rng.sample(self.jobs, min(2, len(self.jobs))):
+                choices[job] = rng.choice(self.job_options(job))
+            order = self._random_topological_order(rng)
+            candidate, order, choices = self.hill_climb(order, choices, max_rounds)
+            if candidate.makespan < best.makespan - 1e-9:
+                best, best_order, best_choices = candidate, order, choices
+        return best
+
+    def _random_topological_order(self, rng):
+        remaining = {job: set(preds) for (job, preds) in self.predecessors.items()}
+        order = []
+        while remaining:
+            ready = sorted(job for (job, preds) in remaining.items() if not preds)
+            job = rng.choice(ready)
+            order.append(job)
+            del remaining[job]
+            for preds in remaining.values():
+                preds.discard(job)
+        return order
+
+
+def part3_scheduler(nodes=PART3_NODES, colocation_weight=0.5, predecessors=None, runtime=None):
+    runtime = runtime or RuntimeModel(load_thread_runtimes())
+    penalties = colocation_penalties(load_matrix())
+    jobs = [job_name(suite) for suite in SUITES]
+    return DagScheduler(jobs, nodes, runtime, penalties, predecessors, colocation_weight)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute a makespan-minimizing part3 schedule.")
+    parser.add_argument("-o", "--output", help="write the plan as JSON for part3/run.py --plan")
+    parser.add_argument("--colocation-weight", type=float, default=0.5)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--restarts", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fitted", action="store_true",
+                        help="predict runtimes with the fitted speedup models (cca.speedup) instead of interpolating")
+    args = parser.parse_args(argv)
+
+    runtime = None
+    if args.fitted:
+        from cca.speedup import FittedRuntimeModel, fit_models
+        runtime = FittedRuntimeModel(fit_models())
+    plan = part3_scheduler(colocation_weight=args.colocation_weight, runtime=runtime).schedule(max_rounds=args.rounds, restarts=args.restarts, seed=args.seed)
+    print(plan.describe())
+    if args.output:
+        plan.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
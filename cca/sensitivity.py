@@ -0,0 +1,138 @@
+import argparse
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from cca.capacity import SLO_US
+from cca.matrix import NODE_WIDE_INTERFERENCES
+from cca.parsec import INTERFERENCES, SUITES, load_interference_slowdowns
+from cca.store import REPO_ROOT, ResultStore, canonical_run
+from cca.transform import MEASUREMENT_TYPES
+
+SENSITIVITY_FILE = os.path.join(REPO_ROOT, "part2a", "sensitivity.csv")
+MEMCACHED = "memcached"
+RESOURCES = [i for i in INTERFERENCES if i != "none"]
+
+
+def parsec_sensitivity(slowdowns=None):
+    """Suite x resource matrix of runtime slowdowns under each ibench interference (part2a)."""
+    slowdowns = slowdowns if slowdowns is not None else load_interference_slowdowns()
+    return pd.DataFrame({resource: {suite: slowdowns[suite][resource] for suite in slowdowns} for resource in RESOURCES})
+
+
+def memcached_sensitivity(store=None, slo_us=SLO_US):
+    """memcached p95 under each ibench interference relative to no interference (part1).
+
+    The ratio is averaged over the target QPS values at which memcached meets
+    the SLO without interference, so saturation beyond the knee doesn't
+    dominate it. Returns None when part1 isn't in the store.
+    """
+    store = store or ResultStore()
+    df = store.query(["p95", "target"], experiment="part1", run=canonical_run)
+    if df.empty:
+        return None
+    p95 = df.groupby(["config", "target"], observed=True)["p95"].mean().unstack("config")
+    baseline = p95[MEASUREMENT_TYPES[0]]
+    rows = baseline <= slo_us
+    return pd.Series({resource: (p95[f"ibench_{resource}"][rows] / baseline[rows]).mean() for resource in RESOURCES},
+                     name=MEMCACHED)
+
+
+def build_matrix(slowdowns=None, store=None, slo_us=SLO_US):
+    """PARSEC rows from part2a plus a memcached row from part1 (if stored)."""
+    matrix = parsec_sensitivity(slowdowns)
+    memcached = memcached_sensitivity(store, slo_us)
+    if memcached is not None:
+        matrix.loc[MEMCACHED] = memcached
+    matrix.index.name = "job"
+    return matrix
+
+
+def save_matrix(matrix, file_path=SENSITIVITY_FILE):
+    matrix.to_csv(file_path, float_format="%.4f")
+
+
+def load_matrix(file_path=SENSITIVITY_FILE):
+    return pd.read_csv(file_path, index_col="job")
+
+
+class ColocationRecommender:
+    """Predicts slowdowns of jobs sharing a node from the sensitivity matrix.
+
+    We only measured how sensitive each job is to every resource, not how
+    hard it stresses them, so a job's pressure profile is taken to be its
+    sensitivity normalized to 0..1: a job that suffers most from membw
+    contention is assumed to use membw the most. The predicted slowdown of a
+    victim is one plus its excess slowdown under each ibench interference
+    weighted by the aggressor's pressure on that resource, averaged over all
+    interferences. An aggressor at full pressure everywhere thus gives the
+    same value as :func:`cca.schedule.colocation_penalties`. Jobs on
+    disjoint cores only interfere through node-wide resources (LLC and
+    memory bandwidth).
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        excess = (matrix[RESOURCES] - 1).clip(lower=0)
+        self.pressure = excess.div(excess.max(axis=1).replace(0, np.nan), axis=0).fillna(0)
+
+    def resources(self, shared_cores):
+        return RESOURCES if shared_cores else [r for r in RESOURCES if r in NODE_WIDE_INTERFERENCES]
+
+    def slowdown(self, victim, aggressor, shared_cores=False):
+        """Predicted slowdown factor of ``victim`` (p95 for memcached, runtime otherwise)."""
+        resources = self.resources(shared_cores)
+        weights = self.pressure.loc[aggressor, resources]
+        excess = (self.matrix.loc[victim, resources] - 1).clip(lower=0)
+        return float(1 + (excess * weights).sum() / len(RESOURCES))
+
+    def pairs(self, jobs=None, shared_cores=False):
+        """Every pair of ``jobs`` with both predicted slowdowns, least harmful first."""
+        jobs = jobs or list(self.matrix.index)
+        rows = []
+        for (a, b) in itertools.combinations(jobs, 2):
+            slowdown_a = self.slowdown(a, b, shared_cores)
+            slowdown_b = self.slowdown(b, a, shared_cores)
+            rows.append({"job": a, "partner": b, "job slowdown": slowdown_a, "partner slowdown": slowdown_b,
+                         "score": max(slowdown_a, slowdown_b)})
+        return pd.DataFrame(rows).sort_values("score", ignore_index=True)
+
+    def memcached_partners(self, shared_cores=False):
+        """PARSEC jobs ranked by predicted memcached p95 inflation when sharing its node."""
+        rows = [{"job": suite, "memcached p95": self.slowdown(MEMCACHED, suite, shared_cores),
+                 "job slowdown": self.slowdown(suite, MEMCACHED, shared_cores)}
+                for suite in self.matrix.index if suite != MEMCACHED]
+        return pd.DataFrame(rows).sort_values(["memcached p95", "job slowdown"], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interference sensitivity matrix and colocation recommendations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help=f"rebuild {os.path.relpath(SENSITIVITY_FILE, REPO_ROOT)} from part2a and part1")
+    build.add_argument("--slo", type=float, default=SLO_US, help="p95 SLO in us")
+    recommend = commands.add_parser("recommend", help="rank colocations by predicted slowdown")
+    recommend.add_argument("--shared-cores", action="store_true", help="jobs share cores, not just the node")
+    recommend.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        matrix = build_matrix(slo_us=args.slo)
+        save_matrix(matrix)
+        print(matrix.to_string(float_format=lambda v: f"{v:.2f}"))
+        return
+
+    recommender = ColocationRecommender(load_matrix())
+    float_format = lambda v: f"{v:.2f}"
+    if MEMCACHED in recommender.matrix.index:
+        print("Sharing a node with memcached:")
+        print(recommender.memcached_partners(args.shared_cores).to_string(index=False, float_format=float_format))
+        print()
+    suites = [s for s in SUITES if s in recommender.matrix.index]
+    print(f"Best PARSEC pairs ({'shared' if args.shared_cores else 'separate'} cores):")
+    print(recommender.pairs(suites, args.shared_cores).head(args.top).to_string(index=False, float_format=float_format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cca.colocation import ColocationModel
+from cca.schedule import PART3_NODES, Plan, RuntimeModel, colocation_penalties
+from cca.parsec import load_thread_runtimes
+from cca.sensitivity import load_matrix
+
+
+class JobResult(NamedTuple):
+    job: str
+    node: str
+    start_ms: int
+    end_ms: int
+
+
+class SimulationResult:
+    def __init__(self, jobs, utilization):
+        self.jobs = jobs
+        self.utilization = utilization
+
+    @property
+    def makespan_ms(self):
+        return max((r.end_ms for r in self.jobs.values()), default=0)
+
+    def describe(self):
+        lines = [f"{'job':<22}{'node':<15}{'start [ms]':>12}{'end [ms]':>12}"]
+        for r in sorted(self.jobs.values(), key=lambda r: (r.node, r.start_ms)):
+            lines.append(f"{r.job:<22}{r.node:<15}{r.start_ms:>12}{r.end_ms:>12}")
+        lines.append(f"makespan: {self.makespan_ms} ms")
+        for (node, value) in self.utilization.items():
+            lines.append(f"{node} core utilization: {value:.1%}")
+        return "\n".join(lines)
+
+
+class Simulator:
+    """Discrete-event replay of a plan with run-time dependent interference.
+
+    Jobs start the moment all their ``after`` jobs have finished, like
+    JobScheduler does. Between events every running job progresses at a rate
+    set by :class:`cca.colocation.ColocationModel`, the same model
+    :class:`cca.schedule.DagScheduler` times its plans with.
+    """
+
+    def __init__(self, nodes, runtime, penalties=None, colocation_weight=0.5):
+        self.model = ColocationModel(nodes, runtime, penalties, colocation_weight)
+
+    def run(self, plan):
+        placements = plan.placements
+        start, end, busy_core_seconds = self.model.replay(placements)
+        now = max(end.values(), default=0.0)
+        jobs = {
+            job: JobResult(job, placements[job].node, round(start[job] * 1000), round(end[job] * 1000))
+            for job in placements
+        }
+        utilization = {
+            name: busy_core_seconds[name] / (len(node.usable_cores) * now) if now > 0 else 0.0
+            for (name, node) in self.model.nodes.items()
+        }
+        return SimulationResult(jobs, utilization)
+
+
+def measured_runs(file_paths):
+    """Per job duration and the makespan in seconds of measured part3 runs (pod dumps), one column per run."""
+    from cca.pods import load_pod_timelines
+
+    columns = {}
+    for (file_path, timeline) in load_pod_timelines(file_paths).items():
+        parsec = timeline[timeline["job"].str.startswith("parsec-")]
+        durations = dict(zip(parsec["job"], (parsec["end_ms"] - parsec["start_ms"]) / 1000))
+        durations["makespan"] = (parsec["end_ms"].max() - parsec["start_ms"].min()) / 1000
+        columns[file_path] = durations
+    return pd.DataFrame(columns)
+
+
+def compare(result, measured):
+    """Simulated against mean measured durations, with the relative error per job and of the makespan."""
+    simulated = {job: (r.end_ms - r.start_ms) / 1000 for (job, r) in result.jobs.items()}
+    simulated["makespan"] = result.makespan_ms / 1000
+    df = pd.DataFrame({"simulated": pd.Series(simulated), "measured": measured.mean(axis=1),
+                       "runs": measured.count(axis=1)})
+    df["error"] = df["simulated"] / df["measured"] - 1
+    return df
+
+
+def fit_colocation_weight(simulator_factory, plan, measured, weights=np.linspace(0, 1, 21)):
+    """Colocation weight whose simulation of ``plan`` has the lowest mean absolute relative job error."""
+    def job_error(weight):
+        df = compare(simulator_factory(weight).run(plan), measured).drop("makespan")
+        return df["error"].abs().mean()
+    errors = {float(weight): job_error(weight) for weight in weights}
+    return min(errors, key=errors.get), errors
+
+
+def part3_simulator(nodes=PART3_NODES, colocation_weight=0.5):
+    runtime = RuntimeModel(load_thread_runtimes())
+    penalties = colocation_penalties(load_matrix())
+    return Simulator(nodes, runtime, penalties, colocation_weight)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict job timings and makespan of part3 plans offline.")
+    parser.add_argument("plans", nargs="+", help="plan JSON files (cca.schedule -o or part3/run.py --dump-plan)")
+    parser.add_argument("--colocation-weight", type=float, default=0.5)
+    parser.add_argument("--measured", nargs="+", metavar="PODS_JSON",
+                        help="pod dumps of runs of the plan (e.g. part3/RUN*/pods_*.json) to check the simulation against")
+    parser.add_argument("--fit-weight", action="store_true",
+                        help="with --measured, also search the colocation weight that best matches the runs")
+    args = parser.parse_args(argv)
+    if args.fit_weight and not args.measured:
+        parser.error("--fit-weight needs --measured")
+
+    simulator = part3_simulator(colocation_weight=args.colocation_weight)
+    measured = measured_runs(args.measured) if args.measured else None
+    for file_path in args.plans:
+        print(f"== {file_path}")
+        plan = Plan.load(file_path)
+        result = simulator.run(plan)
+        print(result.describe())
+        if measured is None:
+            continue
+        print()
+        print(compare(result, measured).to_string(float_format=lambda v: f"{v:.2f}"))
+        if args.fit_weight:
+            weight, errors = fit_colocation_weight(lambda w: part3_simulator(colocation_weight=w), plan, measured)
+            print(f"best colocation weight {weight:.2f}: mean job error {errors[weight]:.1%} "
+                  f"(at {args.colocation_weight:.2f}: {errors.get(args.colocation_weight, float('nan')):.1%})")
+
+
+if __name__ == "__main__":
+    main()
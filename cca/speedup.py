@@ -0,0 +1,139 @@
+import argparse
+import math
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+from cca.parsec import SUITES, load_cpu_times, load_thread_runtimes, suite_name, valid_threads
+
+MIN_GAIN = 0.25
+
+
+def amdahl_speedup(threads, parallel):
+    """Amdahl's law with parallel fraction ``parallel``."""
+    return 1 / ((1 - parallel) + parallel / threads)
+
+
+def usl_speedup(threads, contention, coherency):
+    """Universal Scalability Law; with ``coherency`` 0 it is Amdahl's law with parallel = 1 - contention."""
+    return threads / (1 + contention * (threads - 1) + coherency * threads * (threads - 1))
+
+
+# speedup function, initial parameters, parameter bounds
+MODELS = {
+    "amdahl": (amdahl_speedup, [0.9], ([0.0], [1.0])),
+    "usl": (usl_speedup, [0.1, 0.0], ([0.0, 0.0], [1.0, 1.0])),
+}
+
+
+class SpeedupModel:
+    """Runtime of one benchmark as ``serial_runtime / speedup(threads)`` with fitted parameters."""
+
+    def __init__(self, suite, kind, serial_runtime, params, measured):
+        self.suite = suite
+        self.kind = kind
+        self.serial_runtime = serial_runtime
+        self.params = params
+        self.measured = measured
+
+    @classmethod
+    def fit(cls, suite, runtimes, kind="usl"):
+        """Fit ``{threads: seconds}`` by least squares on log runtime, so every thread count weighs the same."""
+        speedup, initial, bounds = MODELS[kind]
+        threads = np.array(sorted(runtimes), dtype=float)
+        seconds = np.array([runtimes[t] for t in sorted(runtimes)], dtype=float)
+
+        def log_runtime(t, log_serial, *params):
+            return log_serial - np.log(speedup(t, *params))
+
+        log_serial = math.log(seconds[0] * threads[0])
+        lower = [-np.inf] + bounds[0]
+        upper = [np.inf] + bounds[1]
+        fitted, _ = curve_fit(log_runtime, threads, np.log(seconds), p0=[log_serial] + initial, bounds=(lower, upper))
+        return cls(suite, kind, math.exp(fitted[0]), list(fitted[1:]), dict(runtimes))
+
+    def speedup(self, threads):
+        return MODELS[self.kind][0](threads, *self.params)
+
+    def runtime(self, threads):
+        """Predicted runtime in seconds at ``threads`` threads."""
+        return self.serial_runtime / self.speedup(threads)
+
+    def efficiency(self, threads):
+        """Parallel efficiency, speedup per thread."""
+        return self.speedup(threads) / threads
+
+    def best_threads(self, free_cores, min_gain=MIN_GAIN):
+        """Thread count to use on ``free_cores`` cores.
+
+        Threads are raised to the next count the suite can run with (powers of
+        two for radix) while each extra thread still adds at least ``min_gain``
+        to the speedup, so poorly scaling jobs leave cores for others instead
+        of using every free one.
+        """
+        candidates = [t for t in range(2, free_cores + 1) if valid_threads(self.suite, t)]
+        threads = 1
+        for more in candidates:
+            if self.speedup(more) - self.speedup(threads) < min_gain * (more - threads):
+                break
+            threads = more
+        return threads
+
+    def error(self):
+        """Largest relative error of the fit over the measurements."""
+        return max(abs(self.runtime(t) / seconds - 1) for (t, seconds) in self.measured.items())
+
+    def describe_params(self):
+        names = {"amdahl": ["parallel"], "usl": ["contention", "coherency"]}[self.kind]
+        return ", ".join(f"{name} {value:.3f}" for (name, value) in zip(names, self.params))
+
+
+def fit_models(thread_runtimes=None, kind="usl"):
+    """``{suite: SpeedupModel}`` for the part2b measurements."""
+    thread_runtimes = thread_runtimes if thread_runtimes is not None else load_thread_runtimes()
+    return {suite: SpeedupModel.fit(suite, runtimes, kind) for (suite, runtimes) in thread_runtimes.items()}
+
+
+def cpu_efficiency(cpu_times=None):
+    """``{suite: {threads: (user + sys) / real}}``, the average number of busy cores."""
+    cpu_times = cpu_times if cpu_times is not None else load_cpu_times()
+    return {
+        suite: {threads: (t["user"] + t["sys"]) / t["real"] for (threads, t) in values.items()}
+        for (suite, values) in cpu_times.items()
+    }
+
+
+class FittedRuntimeModel:
+    """Drop-in for :class:`cca.schedule.RuntimeModel` that predicts runtimes from the fitted models."""
+
+    def __init__(self, models):
+        self.models = models
+
+    def __call__(self, job, threads):
+        return self.models[suite_name(job)].runtime(threads)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit speedup models to the part2b thread measurements.")
+    parser.add_argument("--kind", choices=sorted(MODELS), default="usl")
+    parser.add_argument("--cores", type=int, nargs="+", default=[2, 4, 8], help="free core counts to recommend threads for")
+    parser.add_argument("--min-gain", type=float, default=MIN_GAIN, help="smallest speedup gain worth one more thread")
+    parser.add_argument("--runtime", type=int, metavar="THREADS", help="also print the predicted runtime at this thread count")
+    args = parser.parse_args(argv)
+
+    models = fit_models(kind=args.kind)
+    efficiency = cpu_efficiency()
+    for suite in SUITES:
+        model = models[suite]
+        best = ", ".join(f"{cores} cores: {model.best_threads(cores, args.min_gain)}" for cores in args.cores)
+        print(f"{suite}: T1 {model.serial_runtime:.1f}s, {model.describe_params()}, max error {model.error():.1%}")
+        print(f"    best threads {best}")
+        if args.runtime is not None:
+            print(f"    runtime at {args.runtime} threads: {model.runtime(args.runtime):.1f}s")
+        if suite in efficiency:
+            busy = ", ".join(f"{t}: {e:.2f}" for (t, e) in sorted(efficiency[suite].items()))
+            print(f"    busy cores (user+sys)/real {busy}")
+
+
+if __name__ == "__main__":
+    main()
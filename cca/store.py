@@ -0,0 +1,126 @@
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from cca.paths import REPO_ROOT, STORE_ROOT
+
+PARTITION_KEYS = ["experiment", "config", "run"]
+
+
+def canonical_run(run):
+    """Whether ``run`` is one of the numbered runs loaded by the transform.
+
+    Ad-hoc runs stored with ``ingest`` are named after their timestamp and are
+    left out of the report figures and models unless asked for by name.
+    """
+    return run.isdigit()
+
+
+def _matches(value, predicate):
+    if predicate is None:
+        return True
+    if callable(predicate):
+        return predicate(value)
+    if isinstance(predicate, (list, tuple, set, frozenset)):
+        return value in {str(p) for p in predicate}
+    return value == str(predicate)
+
+
+def _partition_dirs(path, key, predicate):
+    if not os.path.isdir(path):
+        return []
+    prefix = f"{key}="
+    entries = sorted(e.name for e in os.scandir(path) if e.is_dir() and e.name.startswith(prefix))
+    return [(name[len(prefix):], os.path.join(path, name)) for name in entries if _matches(name[len(prefix):], predicate)]
+
+
+class ResultStore:
+    """Columnar store of mcperf results, one .npy file per column.
+
+    Partitions live in ``experiment=<e>/config=<c>/run=<r>/`` directories so
+    queries only open the partitions and columns they ask for, and columns are
+    memory-mapped rather than parsed.
+    """
+
+    def __init__(self, root=STORE_ROOT):
+        self.root = root
+
+    def partition_path(self, experiment, config, run):
+        return os.path.join(self.root, f"experiment={experiment}", f"config={config}", f"run={run}")
+
+    def write(self, experiment, config, run, df):
+        path = self.partition_path(experiment, config, run)
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_path)
+        for column in df.columns:
+            values = df[column].to_numpy()
+            if values.dtype == object or isinstance(df[column].dtype, pd.CategoricalDtype):
+                values = df[column].astype(str).to_numpy(dtype=str)
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values, allow_pickle=False)
+
+        # Swap the finished partition in so readers never see half a run.
+        if os.path.exists(path):
+            old_path = f"{path}.old-{uuid.uuid4().hex}"
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path)
+        else:
+            os.replace(tmp_path, path)
+        return path
+
+    def partitions(self, experiment=None, config=None, run=None):
+        """List (experiment, config, run, path) for partitions matching the filters.
+
+        Each filter is a value, a collection of values or a callable on the
+        partition value (a string).
+        """
+        found = []
+        for experiment_value, experiment_path in _partition_dirs(self.root, "experiment", experiment):
+            for config_value, config_path in _partition_dirs(experiment_path, "config", config):
+                for run_value, run_path in _partition_dirs(config_path, "run", run):
+                    found.append((experiment_value, config_value, run_value, run_path))
+        return found
+
+    def columns(self, experiment, config, run):
+        path = self.partition_path(experiment, config, run)
+        return sorted(name[:-len(".npy")] for name in os.listdir(path) if name.endswith(".npy"))
+
+    def load(self, path, column):
+        return np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+
+    def query(self, columns, experiment=None, config=None, run=None, where=None):
+        """Read ``columns`` of every matching partition into one DataFrame.
+
+        ``where`` maps column names to callables returning a boolean mask; the
+        columns it needs are loaded only for the filter. The result carries the
+        partition keys as extra columns, with ``run`` converted to int when
+        every run id is numeric.
+        """
+        where = where or {}
+        frames = []
+        for experiment_value, config_value, run_value, path in self.partitions(experiment, config, run):
+            mask = None
+            for column, predicate in where.items():
+                column_mask = predicate(self.load(path, column))
+                mask = column_mask if mask is None else mask & column_mask
+
+            data = {}
+            for column in columns:
+                values = self.load(path, column)
+                data[column] = values[mask] if mask is not None else np.asarray(values)
+            frame = pd.DataFrame(data)
+            frame.insert(0, "run", run_value)
+            frame.insert(0, "config", config_value)
+            frame.insert(0, "experiment", experiment_value)
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(columns=PARTITION_KEYS + list(columns))
+
+        result = pd.concat(frames, ignore_index=True)
+        if result["run"].str.isdigit().all():
+            result["run"] = result["run"].astype(np.int64)
+        return result
@@ -0,0 +1,207 @@
+import argparse
+import subprocess
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from cca.capacity import SLO_US, TOLERANCE
+from cca.mcperf import COLUMN_TYPES, QUERY_TYPES, parse_header
+
+SATURATED_EXIT = 3
+
+
+class Saturated(Exception):
+    """Raised by :func:`ingest` once the detector has seen enough bad intervals."""
+
+    def __init__(self, row, reason):
+        super().__init__(reason)
+        self.row = row
+        self.reason = reason
+
+
+def converters(columns):
+    """Per column conversion of mcperf values, matching the dtypes of :func:`cca.mcperf.parse_mcperf`."""
+    return [str if c not in COLUMN_TYPES else int if np.dtype(COLUMN_TYPES[c]).kind == "i" else float for c in columns]
+
+
+def parse_row(line, columns, convert):
+    """One mcperf result line as a dict of Python values."""
+    values = line.split()
+    if len(values) != len(columns):
+        raise ValueError(f"Expected {len(columns)} mcperf values, got {len(values)}: {line!r}")
+    return {column: kind(value) for (column, kind, value) in zip(columns, convert, values)}
+
+
+def iter_rows(lines):
+    """Yield result rows of mcperf output as its lines arrive; stops at the trailer."""
+    columns = None
+    for line in lines:
+        if columns is None:
+            if line.startswith("#type"):
+                columns = parse_header(line)
+                convert = converters(columns)
+            continue
+        if not line.strip():
+            continue
+        if line.split(None, 1)[0] not in QUERY_TYPES:
+            return
+        yield parse_row(line, columns, convert)
+
+
+def follow(file, poll_interval=0.5, idle_timeout=None):
+    """Yield complete lines of a file that is still being written, like ``tail -f``.
+
+    Stops after ``idle_timeout`` seconds without new data (never if None).
+    """
+    partial = ""
+    idle_since = time.monotonic()
+    while True:
+        chunk = file.readline()
+        if chunk:
+            idle_since = time.monotonic()
+            partial += chunk
+            if partial.endswith("\n"):
+                yield partial
+                partial = ""
+            continue
+        if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+            if partial:
+                yield partial
+            return
+        time.sleep(poll_interval)
+
+
+class RollingStats:
+    """Statistics over the last ``window`` intervals in constant memory."""
+
+    def __init__(self, window=10):
+        self.window = deque(maxlen=window)
+        self.count = 0
+        self.max_p95 = float("-inf")
+        self.max_qps = float("-inf")
+
+    def add(self, row):
+        self.window.append((row["QPS"], row["p95"]))
+        self.count += 1
+        self.max_p95 = max(self.max_p95, row["p95"])
+        self.max_qps = max(self.max_qps, row["QPS"])
+
+    @property
+    def qps(self):
+        return sum(qps for (qps, _) in self.window) / len(self.window) if self.window else float("nan")
+
+    @property
+    def p95(self):
+        """Highest p95 of the window; the SLO is on every interval, so the mean would hide spikes."""
+        return max(p95 for (_, p95) in self.window) if self.window else float("nan")
+
+    def describe(self):
+        return (f"{self.count} intervals, last {len(self.window)}: QPS {self.qps:.0f}, max p95 {self.p95:.0f}us; "
+                f"overall max p95 {self.max_p95:.0f}us")
+
+
+class SaturationDetector:
+    """Flags saturation after ``consecutive`` intervals over the SLO or behind the target QPS."""
+
+    def __init__(self, slo_us=SLO_US, tolerance=TOLERANCE, consecutive=3):
+        self.slo_us = slo_us
+        self.tolerance = tolerance
+        self.consecutive = consecutive
+        self.streak = 0
+
+    def reason(self, row):
+        if self.slo_us is not None and row["p95"] > self.slo_us:
+            return f"p95 {row['p95']:.0f}us above the {self.slo_us:g}us SLO"
+        target = row.get("target")
+        if target and row["QPS"] < (1 - self.tolerance) * target:
+            return f"QPS {row['QPS']:.0f} behind target {target}"
+        return None
+
+    def update(self, row):
+        """Return the reason once the streak is long enough, else None."""
+        reason = self.reason(row)
+        self.streak = self.streak + 1 if reason else 0
+        return reason if self.streak >= self.consecutive else None
+
+
+def ingest(lines, stats=None, detector=None, on_row=None):
+    """Feed mcperf output lines through ``stats`` and ``detector`` as they arrive.
+
+    ``on_row(row, stats)`` is called for every interval, e.g. to pass live
+    samples to the part4 controller. Raises :class:`Saturated` when the
+    detector fires. Returns ``stats``.
+    """
+    stats = stats or RollingStats()
+    for row in iter_rows(lines):
+        stats.add(row)
+        if on_row is not None:
+            on_row(row, stats)
+        if detector is not None:
+            reason = detector.update(row)
+            if reason is not None:
+                raise Saturated(row, reason)
+    return stats
+
+
+def tee(lines, file):
+    for line in lines:
+        file.write(line)
+        file.flush()
+        yield line
+
+
+def print_row(row, stats):
+    target = f" (target {row['target']})" if "target" in row else ""
+    print(f"QPS {row['QPS']:.0f}{target}, p95 {row['p95']:.0f}us | {stats.describe()}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Parse mcperf output while it is written and stop saturated runs early.",
+        epilog="Either run mcperf through this tool (-o FILE -- ./mcperf ...) or --follow a file it writes.")
+    parser.add_argument("-o", "--output", help="file to copy the mcperf output to")
+    parser.add_argument("--follow", metavar="FILE", help="tail a file written by another process instead")
+    parser.add_argument("--idle-timeout", type=float, default=60, help="stop following after this many idle seconds")
+    parser.add_argument("--slo", type=float, default=SLO_US, help="p95 SLO in us")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--consecutive", type=int, default=3, help="bad intervals in a row before aborting")
+    parser.add_argument("--window", type=int, default=10, help="intervals in the rolling statistics")
+    parser.add_argument("--no-abort", action="store_true", help="only report saturation")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if bool(command) == bool(args.follow):
+        parser.error("give either a mcperf command or --follow FILE")
+    if command and not args.output:
+        parser.error("-o is required when running mcperf")
+
+    stats = RollingStats(args.window)
+    detector = None if args.no_abort else SaturationDetector(args.slo, args.tolerance, args.consecutive)
+    if args.follow:
+        with open(args.follow, "r") as file:
+            try:
+                ingest(follow(file, idle_timeout=args.idle_timeout), stats, detector, print_row)
+            except Saturated as saturated:
+                print(f"Saturated: {saturated.reason}", file=sys.stderr)
+                return SATURATED_EXIT
+        return 0
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, bufsize=1)
+    with open(args.output, "w") as output:
+        try:
+            ingest(tee(process.stdout, output), stats, detector, print_row)
+            # Keep the trailer (CPU usage stats) in the file
+            for line in process.stdout:
+                output.write(line)
+        except Saturated as saturated:
+            print(f"Saturated: {saturated.reason}; stopping mcperf", file=sys.stderr)
+            process.terminate()
+            process.wait()
+            return SATURATED_EXIT
+    return process.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
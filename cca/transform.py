@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from cca.mcperf import read_mcperf
+from cca.paths import file_hash
+from cca.store import REPO_ROOT, STORE_ROOT, ResultStore
+
+MEASUREMENT_TYPES = {
+    0: "no_intf",
+    1: "ibench_cpu",
+    2: "ibench_l1d",
+    3: "ibench_l1i",
+    4: "ibench_l2",
+    5: "ibench_llc",
+    6: "ibench_membw",
+}
+
+PART1_FILE = re.compile(r"^output_(?P<interference>\d+)_(?P<run>\d+)\.txt$")
+PART3_FOLDER = re.compile(r"^RUN(?P<run>\d+)$")
+PART3_FILE = re.compile(r"^mcperf_(?P<run>\d+)\.txt$")
+PART4_Q1_FOLDER = re.compile(r"^t(?P<threads>\d+)_c(?P<cores>\d+)$")
+PART4_Q1_FILE = re.compile(r"^results_(?P<run>\d+)\.txt$")
+
+MANIFEST_FILE = ".manifest.json"
+
+
+class TransformTask(NamedTuple):
+    source: str
+    experiment: str
+    config: str
+    run: str
+
+
+def part1_tasks(root=os.path.join(REPO_ROOT, "part1")):
+    tasks = []
+    for file in sorted(os.listdir(f"{root}/outputs")):
+        match = PART1_FILE.match(file)
+        if match is None:
+            continue
+        measurement_type = MEASUREMENT_TYPES[int(match["interference"])]
+        tasks.append(TransformTask(f"{root}/outputs/{file}", "part1", measurement_type, match["run"]))
+    return tasks
+
+
+def part3_tasks(root=os.path.join(REPO_ROOT, "part3")):
+    tasks = []
+    for folder in sorted(os.listdir(root)):
+        if PART3_FOLDER.match(folder) is None or not os.path.isdir(f"{root}/{folder}"):
+            continue
+        for file in sorted(os.listdir(f"{root}/{folder}")):
+            match = PART3_FILE.match(file)
+            if match is not None:
+                tasks.append(TransformTask(f"{root}/{folder}/{file}", "part3", "default", match["run"]))
+    return tasks
+
+
+def part4_q1_tasks(root=os.path.join(REPO_ROOT, "part4", "q1")):
+    tasks = []
+    for folder in sorted(os.listdir(root)):
+        folder_match = PART4_Q1_FOLDER.match(folder)
+        if folder_match is None or not os.path.isdir(f"{root}/{folder}"):
+            continue
+        config = f"t_{folder_match['threads']}_c_{folder_match['cores']}"
+        for file in sorted(os.listdir(f"{root}/{folder}")):
+            match = PART4_Q1_FILE.match(file)
+            if match is not None:
+                tasks.append(TransformTask(f"{root}/{folder}/{file}", "part4_q1", config, match["run"]))
+    return tasks
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def transform_file(task, store_root=STORE_ROOT, known_hash=None):
+    """Load one mcperf output into the result store. Returns (sha256, written)."""
+    store = ResultStore(store_root)
+    digest = file_hash(task.source)
+    if digest == known_hash and os.path.isdir(store.partition_path(task.experiment, task.config, task.run)):
+        return digest, False
+
+    store.write(task.experiment, task.config, task.run, read_mcperf(task.source))
+    return digest, True
+
+
+def batch_transform(tasks, store_root=STORE_ROOT, workers=None, force=False):
+    """Transform all changed inputs in a process pool.
+
+    An input is skipped without reading it when its size and mtime match the
+    manifest, and skipped after hashing when only its mtime changed.
+    """
+    store = ResultStore(store_root)
+    manifest_path = os.path.join(store_root, MANIFEST_FILE)
+    manifest = {} if force else load_manifest(manifest_path)
+    pending = []
+    for task in tasks:
+        stat = os.stat(task.source)
+        target = store.partition_path(task.experiment, task.config, task.run)
+        entry = manifest.get(task.source)
+        if entry is not None and entry["target"] == target:
+            if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size and os.path.isdir(target):
+                continue
+            known_hash = entry["sha256"]
+        else:
+            known_hash = None
+        pending.append((task, stat, target, known_hash))
+
+    written = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(transform_file, task, store_root, known_hash) for (task, _, _, known_hash) in pending]
+            for (task, stat, target, _), future in zip(pending, futures):
+                digest, did_write = future.result()
+                written += did_write
+                manifest[task.source] = {
+                    "sha256": digest,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "target": target,
+                }
+        os.makedirs(store_root, exist_ok=True)
+        save_manifest(manifest_path, manifest)
+
+    print(f"Transformed {written} of {len(tasks)} files ({len(tasks) - len(pending)} unchanged, {len(pending) - written} rehashed)")
+    return written
+
+
+EXPERIMENTS = {
+    "part1": part1_tasks,
+    "part3": part3_tasks,
+    "part4_q1": part4_q1_tasks,
+}
+
+
+def transform_experiment(experiment, store_root=STORE_ROOT, workers=None, force=False):
+    return batch_transform(EXPERIMENTS[experiment](), store_root, workers=workers, force=force)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load mcperf outputs into the result store.")
+    parser.add_argument("experiments", nargs="*", metavar="experiment", help=f"one of {sorted(EXPERIMENTS)} (default: all)")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and rewrite every partition")
+    args = parser.parse_args(argv)
+
+    unknown = [e for e in args.experiments if e not in EXPERIMENTS]
+    if unknown:
+        parser.error(f"unknown experiments: {unknown}")
+
+    for experiment in args.experiments or sorted(EXPERIMENTS):
+        transform_experiment(experiment, workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import math
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+from cca.parsec import TimeParser
+from cca.watch import job_succeeded
+
+JOB_TIMEOUT = 3600
+POD_TIMEOUT = 300
+
+
+class WaitError(Exception):
+    """An object reached a state it can't leave (failed, deleted) or the wait timed out."""
+
+
+def job_failed(job):
+    status = job.get("status", {})
+    return any(c.get("type") == "Failed" and c.get("status") == "True" for c in status.get("conditions", []))
+
+
+def pod_phase(pod):
+    return pod.get("status", {}).get("phase")
+
+
+def watch_until(client, kind, done, timeout, failed=lambda obj: False, what=None, field_selector=None,
+                label_selector=None):
+    """Block until ``done(obj)`` holds for an object matching the selectors and return it.
+
+    Returns as soon as the API server reports the transition instead of on
+    the next poll. A watch without resourceVersion first replays the current
+    state, so an object that is already done returns immediately. Raises
+    :class:`WaitError` on ``failed(obj)``, deletion or after ``timeout``
+    seconds.
+    """
+    what = what or kind
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise WaitError(f"Timed out after {timeout}s waiting for {what}")
+        for (event_type, obj) in client.watch(kind, field_selector=field_selector, label_selector=label_selector,
+                                              timeout_seconds=math.ceil(remaining)):
+            if event_type == "DELETED":
+                raise WaitError(f"{what} was deleted while waiting for it")
+            if event_type == "ERROR":
+                # e.g. 410 Gone; just open a new watch
+                break
+            if failed(obj):
+                raise WaitError(f"{what} failed: {obj.get('status', {})}")
+            if done(obj):
+                return obj
+
+
+def wait_for(client, kind, name, done, timeout, failed=lambda obj: False):
+    """:func:`watch_until` for the object called ``name``."""
+    return watch_until(client, kind, done, timeout, failed, what=f"{kind} {name}", field_selector=f"metadata.name={name}")
+
+
+def wait_for_job(client, name, timeout=JOB_TIMEOUT):
+    """Wait until the Job succeeded."""
+    return wait_for(client, "Job", name, job_succeeded, timeout, failed=job_failed)
+
+
+def wait_for_pod(client, name, phases=("Running",), timeout=POD_TIMEOUT):
+    """Wait until the Pod is in one of ``phases`` (Pending, Running, Succeeded)."""
+    return wait_for(client, "Pod", name, lambda pod: pod_phase(pod) in phases, timeout,
+                    failed=lambda pod: pod_phase(pod) == "Failed" and "Failed" not in phases)
+
+
+def owned_by(obj, owner_uid):
+    return any(ref.get("uid") == owner_uid for ref in obj["metadata"].get("ownerReferences", []))
+
+
+def wait_for_job_pod(client, job, timeout=POD_TIMEOUT):
+    """The Pod of the Job object ``job`` as soon as its container started (or already finished).
+
+    Pods are matched on the Job's UID, not just its name: a Job re-created
+    under the same name may still have the pod of its predecessor around,
+    since background deletion returns before the pod is gone.
+    """
+    job_name, job_uid = job["metadata"]["name"], job["metadata"]["uid"]
+    return watch_until(client, "Pod",
+                       lambda pod: owned_by(pod, job_uid) and pod_phase(pod) in ("Running", "Succeeded", "Failed"),
+                       timeout, what=f"the pod of job {job_name}", label_selector=f"job-name={job_name}")
+
+
+def follow_job_times(client, job, timeout=JOB_TIMEOUT, start_timeout=POD_TIMEOUT):
+    """Follow the log of the Job object ``job``'s pod and return ``(times, log)`` once ``time`` printed real/user/sys.
+
+    The log is attached as soon as the container starts and scanned line by
+    line, so the result is known the moment the benchmark ends, without
+    waiting for the Job status and fetching the whole log afterwards. Raises
+    :class:`WaitError` if the pod doesn't start within ``start_timeout``
+    seconds or the times aren't printed within ``timeout`` seconds of that.
+    """
+    pod_name = wait_for_job_pod(client, job, start_timeout)["metadata"]["name"]
+    deadline = time.monotonic() + timeout
+    parser = TimeParser()
+    lines = []
+    try:
+        # The read timeout catches a silent stream, the deadline a slow one
+        with closing(client.follow_logs(pod_name, timeout)) as log:
+            for line in log:
+                lines.append(line)
+                if parser.feed(line):
+                    return parser.times, "\n".join(lines)
+                if time.monotonic() > deadline:
+                    break
+    except TimeoutError:
+        pass
+    else:
+        if time.monotonic() <= deadline:
+            raise WaitError(f"The log of {pod_name} ended without real/user/sys times")
+    raise WaitError(f"Timed out after {timeout}s waiting for the times in the log of {pod_name}")
+
+
+def container_started(pod):
+    """When the pod's first running container started, as an aware datetime (None if not running)."""
+    for status in pod.get("status", {}).get("containerStatuses", []):
+        started = status.get("state", {}).get("running", {}).get("startedAt")
+        if started:
+            return datetime.fromisoformat(started)
+    return None
+
+
+def wait_until_warm(client, name, warmup=0.0, timeout=POD_TIMEOUT):
+    """Wait until the Pod runs and its container has been up for ``warmup`` seconds.
+
+    Only the part of the warm-up that hasn't already passed since the
+    container started is slept, e.g. for an ibench pod that needs a moment to
+    reach full pressure.
+    """
+    pod = wait_for_pod(client, name, timeout=timeout)
+    started = container_started(pod)
+    if warmup > 0 and started is not None:
+        elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+        time.sleep(max(0.0, warmup - elapsed))
+    return pod
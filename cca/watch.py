@@ -0,0 +1,125 @@
+import codecs
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from cca.paths import TIMELINE_CACHE, timeline_cache_path
+
+NODE_LABEL = "cca-project-nodetype"
+
+ITEMS_PATTERN = re.compile(r'"items"\s*:\s*\[')
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def iter_json_objects(stream, chunk_size=65536):
+    """Yield JSON documents from a binary stream as soon as each one is complete.
+
+    ``kubectl get -w -o json`` writes pretty-printed objects back to back with
+    no framing, so the buffer is decoded with ``raw_decode`` until it only
+    holds an incomplete document.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    while True:
+        # read1 returns whatever is in the pipe instead of waiting for chunk_size bytes
+        chunk = stream.read1(chunk_size)
+        buffer = (buffer + utf8.decode(chunk, final=not chunk)).lstrip()
+        while buffer:
+            try:
+                obj, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break
+            yield obj
+            buffer = buffer[end:].lstrip()
+        if not chunk:
+            if buffer:
+                raise ValueError(f"Watch stream ended inside a JSON document: {buffer[:80]!r}")
+            return
+
+
+def job_succeeded(job):
+    status = job.get("status", {})
+    if status.get("succeeded", 0) >= 1:
+        return True
+    return any(c.get("type") == "Complete" and c.get("status") == "True" for c in status.get("conditions", []))
+
+
+def iter_items(file, chunk_size=1 << 16):
+    """Yield the elements of the top-level ``items`` array of a pod dump one by one.
+
+    Only the item being decoded is kept in memory, not the whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+    while True:
+        match = ITEMS_PATTERN.search(buffer)
+        if match is not None:
+            buffer = buffer[match.end():]
+            break
+        if eof:
+            return
+        # Keep a tail in case the key is split across chunks
+        buffer = buffer[-16:]
+        fill()
+
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer.startswith("]"):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("Pod dump ended inside the items array")
+            fill()
+            continue
+        buffer = buffer[end:]
+        yield item
+
+
+def container_runs(items):
+    """Yield ``(container, node, startedAt, finishedAt)`` for every container of the pod items.
+
+    ``node`` is the node type label, or the node name when the pod has no
+    selector. The timestamps are the raw RFC 3339 strings, ``None`` while the
+    container has not terminated.
+    """
+    for item in items:
+        spec = item.get("spec", {})
+        node = spec.get("nodeSelector", {}).get(NODE_LABEL) or spec.get("nodeName", "")
+        for status in item.get("status", {}).get("containerStatuses", []):
+            terminated = status.get("state", {}).get("terminated", {})
+            yield (status["name"], node, terminated.get("startedAt"), terminated.get("finishedAt"))
+
+
+def epoch_ms(timestamp):
+    """Kubernetes RFC 3339 UTC timestamp to epoch ms, -1 when missing (like cca.pods.to_epoch_ms)."""
+    if not timestamp:
+        return -1
+    return (datetime.fromisoformat(timestamp) - EPOCH) // timedelta(milliseconds=1)
+
+
+def read_job_times(file_path, cache_dir=TIMELINE_CACHE):
+    """``[(container, start_ms, end_ms)]`` of a pod dump with the standard library only.
+
+    Reads the timeline :func:`cca.pods.cached_pod_timelines` cached for the
+    dump if there is one, and parses the dump otherwise (without caching it).
+    """
+    cache_path = timeline_cache_path(file_path, cache_dir)
+    if os.path.exists(cache_path):
+        with open(cache_path, "r") as file:
+            cached = json.load(file)
+        columns = [cached["columns"].index(column) for column in ("job", "start_ms", "end_ms")]
+        return [tuple(row[i] for i in columns) for row in cached["data"]]
+    with open(file_path, "r") as file:
+        return [(name, epoch_ms(start), epoch_ms(end)) for (name, _, start, end) in container_runs(iter_items(file))]
@@ -1,10 +1,35 @@
-import subprocess
-import time
-import re
+import argparse
+import os
+import sys
 from pprint import pprint
 
 import logging
 
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cca.journal import Journal, collect, pending_trials
+from cca.kube import ClusterClient
+from cca.matrix import Cell, MatrixRunner, Slot, parse_slots, place
+from cca.sensitivity import SENSITIVITY_FILE, build_matrix, save_matrix
+from cca.wait import JOB_TIMEOUT, follow_job_times, wait_until_warm
+
+parser = argparse.ArgumentParser(description="Run the part2a PARSEC x ibench interference matrix.")
+parser.add_argument("--slots", default="", help="comma-separated node[:cpuset] slots, e.g. 'node-1,node-2:0-1'; "
+                                                "cells run concurrently, one per node, pinned to the slot's cpuset "
+                                                "(default: one cell at a time on the manifests' nodes)")
+parser.add_argument("--concurrency", type=int, default=None, help="maximum number of cells running at once")
+parser.add_argument("--warmup", type=float, default=0.0,
+                    help="extra seconds an ibench pod must have run before its job starts "
+                         "(default: start as soon as its container runs)")
+parser.add_argument("--timeout", type=float, default=JOB_TIMEOUT, help="seconds to wait for a job to finish once it started")
+parser.add_argument("--journal", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "journal.jsonl"),
+                    help="finished cells are appended here and skipped on restart (default: part2a/journal.jsonl)")
+parser.add_argument("--repetitions", type=int, default=1, help="runs of every cell; the median runtime is reported")
+parser.add_argument("--shuffle", action="store_true", help="run the cells in random order")
+parser.add_argument("--seed", type=int, default=None, help="seed of --shuffle")
+args = parser.parse_args()
+
 open("example.log", "w").close()
 logging.basicConfig(filename='example.log', encoding='utf-8', level=logging.DEBUG)
 
@@ -24,31 +49,27 @@ results = {
     "vips": [],
 }
 
+slots = parse_slots(args.slots) or [Slot()]
+
 def info(msg):
     print(f"INFO: {msg}")
 
-def run(cmd):
-    out = subprocess.run(cmd, capture_output=True)
-    stdout = out.stdout.decode('unicode_escape').strip()
-    stderr = out.stderr.decode('unicode_escape').strip()
-    if out.stdout:
-        logging.info(f"CMD OUT: {stdout}")
+client = ClusterClient()
 
-    if out.stderr:
-        logging.error(f"CMD ERR: {stderr}")
+def load_manifest(file_path):
+    with open(file_path, "r") as file:
+        return yaml.safe_load(file)
 
-    return stdout
+def setup_bench_interference(interference, slot, suffix):
+    info(f"Setting up bench interference {interference} on {slot}...")
+    pod = client.create(place(load_manifest(f"interference/ibench-{interference}.yaml"), slot, suffix))
+    info(f"Waiting for {pod['metadata']['name']} to run...")
+    wait_until_warm(client, pod["metadata"]["name"], args.warmup)
+    return pod["metadata"]["name"]
 
-def setup_bench_interference(interference):
-    info(f"Setting up bench interference {interference}...")
-    run(["kubectl", "create", "-f", f"interference/ibench-{interference}.yaml"])
-    info("Sleeping for 15 seconds to ensure interference is set up properly...\n\n")
-    time.sleep(15)
-
-def delete_bench_interference(interference):
-    pod_name = f"ibench-{interference}"
-    info(f"Deleting bench interference {interference}")
-    run(["kubectl", "delete", "pod", pod_name])
+def delete_bench_interference(pod_name):
+    info(f"Deleting bench interference {pod_name}")
+    client.delete("Pod", pod_name)
 
 def duration_to_ms(duration_str):
     parts = duration_str.replace('s', '').split('m')
@@ -59,56 +80,70 @@ def duration_to_ms(duration_str):
     total_ms = (minutes * 60 + seconds) * 1000
     return total_ms
 
-def run_test_suite(suite, interference):
+def run_test_suite(cell, slot):
+    suite, interference = cell.suite, cell.interference
+    interference_pod = None
     if interference != "none":
-        setup_bench_interference(interference)
+        interference_pod = setup_bench_interference(interference, slot, cell.name)
 
-    run(["kubectl", "create", "-f", f"parsec-benchmarks/part2a/parsec-{suite}.yaml"])
-    job_name = f"parsec-{suite}"
+    job = client.create(place(load_manifest(f"parsec-benchmarks/part2a/parsec-{suite}.yaml"), slot, cell.name))
+    job_name = job["metadata"]["name"]
     info(f"Running job {job_name} with interference {interference}...")
 
-    pods_out = run(["kubectl", "get", "pods"])
-
-    info(f"Waiting for {job_name} with {interference} to be created...")
-    time.sleep(5)
+    # Attach to the log as soon as the container starts and take the times the
+    # moment `time` prints them, instead of waiting for the Job status first
+    info(f"Following {job_name} until it reports its times...")
+    times, logs = follow_job_times(client, job, args.timeout)
+    logging.info(f"LOGS {job_name}: {logs}")
+    print(f"{job_name}: Real: {times['real']}, User: {times['user']}, Sys: {times['sys']}")
 
-    info(f"Waiting for {job_name} with {interference} complete...")
-    while True:
-        pods_out = run(["kubectl", "get", "jobs"])
-        done = int(re.findall(re.compile(f"{job_name}\s+(\d)\/1"), pods_out)[0])
-        if done:
-            break
-        time.sleep(10)
+    # Only remove this cell's objects, other cells may still be running
+    client.delete("Job", job_name)
+    if interference_pod is not None:
+        delete_bench_interference(interference_pod)
 
-    info("Job completed! Extracting measurements...")
-    pod_id = run(["kubectl", "get", "pods", f"--selector=job-name={job_name}", f"--output=jsonpath='{{.items[*].metadata.name}}'"])[1:-1]
-    logs = run(["kubectl", "logs", pod_id])
-
-    real = re.findall(re.compile(f"real\s+(\d+m\d+.\d+s)"), logs)[0]
-    user = re.findall(re.compile(f"user\s+(\d+m\d+.\d+s)"), logs)[0]
-    sys = re.findall(re.compile(f"sys\s+(\d+m\d+.\d+s)"), logs)[0]
-    print(f"Real: {real}, User: {user}, Sys: {sys}")
-
-    results[suite].append(real)
-    
-    clear()
+    return times
 
 def clear():
-    run(["kubectl", "delete", "jobs", "--all"])
-    run(["kubectl", "delete", "pods", "--all"])
+    client.delete_all("Job")
+    client.delete_all("Pod")
 
 clear()
 print()
 
+journal = Journal(args.journal)
+
+def run_and_record(cell, slot):
+    # The whole real/user/sys record, so CPU time can be analysed later
+    times = run_test_suite(cell, slot)
+    journal.record((cell.suite, cell.interference), cell.repetition, times)
+    return times
+
+keys = [(suite, interference) for interference in interferences for suite in test_suites]
+completed = journal.completed()
+cells = [Cell(suite, interference, repetition)
+         for ((suite, interference), repetition) in pending_trials(keys, args.repetitions, completed, args.shuffle, args.seed)]
+print(f"Running {len(cells)} cells on {len(slots)} slot(s), {len(keys) * args.repetitions - len(cells)} already in {args.journal}\n")
+MatrixRunner(slots, run_and_record, args.concurrency).run(cells)
+
+def median_duration(durations):
+    # The lower median, so the reported value is one that was actually measured
+    return sorted(durations, key=duration_to_ms)[(len(durations) - 1) // 2]
+
+# Journals written before user/sys were recorded only hold the real time
+cell_results = {key: [t['real'] if isinstance(t, dict) else t for t in values]
+                for (key, values) in collect(journal.completed(), keys, args.repetitions).items()}
 for interference in interferences:
-    print(f"Starting jobs with interference {interference}\n")
     for suite in test_suites:
-        run_test_suite(suite, interference)
-
-    print("\n\n")
+        results[suite].append(median_duration(cell_results[(suite, interference)]))
 
 clear()
 
+if args.repetitions > 1:
+    print("ALL REPETITIONS")
+    for (key, value) in cell_results.items():
+        print(f"{key[0]} {key[1]}: {value}")
+
 print("RAW RESULTS")
 for (key, value) in results.items():
     print(f"{key}: {value}")
@@ -129,4 +164,8 @@ for (key, value) in results.items():
 
 print("NORMALIZED RESULTS")
 for (key, value) in normalized_results.items():
-    print(f"{key}: {value}")
\ No newline at end of file
+    print(f"{key}: {value}")
+
+# Persist the suite x resource matrix (plus the memcached row from part1) for `python -m cca.sensitivity recommend`
+save_matrix(build_matrix({key: dict(zip(interferences, value)) for (key, value) in normalized_results.items()}))
+print(f"Saved the sensitivity matrix to {SENSITIVITY_FILE}")
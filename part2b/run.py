@@ -1,9 +1,30 @@
-import subprocess
-import time
-import re
+import argparse
+import os
+import sys
 
 import logging
 
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cca.journal import Journal, collect, pending_trials
+from cca.kube import ClusterClient
+from cca.parsec import PART2B_RESULTS, THREAD_ARG_PATTERN, format_thread_results, manifest_threads
+from cca.wait import follow_job_times
+
+parser = argparse.ArgumentParser(description="Run every PARSEC job alone with the part2b manifests.")
+parser.add_argument("--threads", type=int, default=None,
+                    help="run the jobs with this many threads (-n) instead of what the manifests say")
+parser.add_argument("--results", default=PART2B_RESULTS,
+                    help="file the N=<threads> sections are appended to (read by cca.speedup); '-' to only print them")
+parser.add_argument("--journal", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "journal.jsonl"),
+                    help="finished jobs are appended here, with their thread count, and skipped on restart "
+                         "(default: part2b/journal.jsonl)")
+parser.add_argument("--repetitions", type=int, default=1, help="runs of every job; the median runtime is reported")
+parser.add_argument("--shuffle", action="store_true", help="run the jobs in random order")
+parser.add_argument("--seed", type=int, default=None, help="seed of --shuffle")
+args = parser.parse_args()
+
 open("example.log", "w").close()
 logging.basicConfig(filename='example.log', encoding='utf-8', level=logging.DEBUG)
 
@@ -11,30 +32,10 @@ logging.basicConfig(filename='example.log', encoding='utf-8', level=logging.DEBU
 
 test_suites = ["blackscholes", "canneal", "dedup", "ferret", "freqmine", "radix", "vips"]
 
-results = {
-    "blackscholes": None,
-    "canneal": None,
-    "dedup": None,
-    "ferret": None,
-    "freqmine": None,
-    "radix": None,
-    "vips": None,
-}
-
 def info(msg):
     print(f"INFO: {msg}")
 
-def run(cmd):
-    out = subprocess.run(cmd, capture_output=True)
-    stdout = out.stdout.decode('unicode_escape').strip()
-    stderr = out.stderr.decode('unicode_escape').strip()
-    if out.stdout:
-        logging.info(f"CMD OUT: {stdout}")
-
-    if out.stderr:
-        logging.error(f"CMD ERR: {stderr}")
-
-    return stdout
+client = ClusterClient()
 
 def duration_to_ms(duration_str):
     parts = duration_str.replace('s', '').split('m')
@@ -45,48 +46,61 @@ def duration_to_ms(duration_str):
     total_ms = (minutes * 60 + seconds) * 1000
     return total_ms
 
+def load_job(suite):
+    with open(f"parsec-benchmarks/part2b/parsec-{suite}.yaml", "r") as file:
+        manifest = yaml.safe_load(file)
+    if args.threads is not None:
+        for container in manifest["spec"]["template"]["spec"]["containers"]:
+            container["args"] = [THREAD_ARG_PATTERN.sub(f"-n {args.threads}", arg) for arg in container.get("args", [])]
+    return manifest
+
 def run_test_suite(suite):
-    run(["kubectl", "create", "-f", f"parsec-benchmarks/part2b/parsec-{suite}.yaml"])
-    job_name = f"parsec-{suite}"
+    job = client.create(load_job(suite))
+    job_name = job["metadata"]["name"]
     info(f"Running job {job_name}...")
 
-    info(f"Waiting for {job_name} to be created...")
-    time.sleep(5)
-
-    info(f"Waiting for {job_name} to complete...")
-    while True:
-        pods_out = run(["kubectl", "get", "jobs"])
-        done = int(re.findall(re.compile(f"{job_name}\s+(\d)\/1"), pods_out)[0])
-        if done:
-            break
-        time.sleep(10)
-
-    info("Job completed! Extracting measurements...")
-    pod_id = run(["kubectl", "get", "pods", f"--selector=job-name={job_name}", f"--output=jsonpath='{{.items[*].metadata.name}}'"])[1:-1]
-    logs = run(["kubectl", "logs", pod_id])
-
-    real = re.findall(re.compile(f"real\s+(\d+m\d+.\d+s)"), logs)[0]
-    user = re.findall(re.compile(f"user\s+(\d+m\d+.\d+s)"), logs)[0]
-    sys = re.findall(re.compile(f"sys\s+(\d+m\d+.\d+s)"), logs)[0]
-    print(f"Real: {real}, User: {user}, Sys: {sys}")
-
-    results[suite] = real
+    info(f"Following {job_name} until it reports its times...")
+    times, logs = follow_job_times(client, job)
+    logging.info(f"LOGS {job_name}: {logs}")
+    print(f"Real: {times['real']}, User: {times['user']}, Sys: {times['sys']}")
     
     clear()
+    return times
 
 def clear():
-    run(["kubectl", "delete", "jobs", "--all"])
-    run(["kubectl", "delete", "pods", "--all"])
+    client.delete_all("Job")
+    client.delete_all("Pod")
 
 clear()
 print()
 
-for suite in test_suites:
-    run_test_suite(suite)
+journal = Journal(args.journal)
+# The thread count is part of the key, so one journal holds every N
+keys = [(suite, manifest_threads(load_job(suite))) for suite in test_suites]
+trials = pending_trials(keys, args.repetitions, journal.completed(), args.shuffle, args.seed)
+print(f"Running {len(trials)} jobs, {len(keys) * args.repetitions - len(trials)} already in {args.journal}\n")
+
+for ((suite, threads), repetition) in trials:
+    info(f"{suite} with {threads} threads, repetition {repetition}")
+    journal.record((suite, threads), repetition, run_test_suite(suite))
     print("\n\n")
 
 clear()
 
-print("RESULTS")
-for (key, value) in results.items():
-    print(f"{key}: {value}")
\ No newline at end of file
+# real/user/sys per thread count and suite
+results = {}
+for ((suite, threads), repetitions) in collect(journal.completed(), keys, args.repetitions).items():
+    # The lower median, so the reported times are ones that were actually measured
+    times = sorted(repetitions, key=lambda t: duration_to_ms(t['real']))[(len(repetitions) - 1) // 2]
+    results.setdefault(threads, {})[suite] = times
+
+sections = "\n\n".join(format_thread_results(threads, times) for (threads, times) in sorted(results.items()))
+print(sections)
+
+if args.results != "-":
+    # Later sections for the same N replace earlier ones when the file is read
+    with open(args.results, "a+") as file:
+        file.seek(0)
+        separator = "\n\n" if file.read().strip() else ""
+        file.write(separator + sections + "\n")
+    print(f"Appended to {args.results}")
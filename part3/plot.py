@@ -1,10 +1,16 @@
-import json
-import datetime
-import re
+import argparse
+import os
+import sys
 from statistics import mean, stdev
-import csv
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cca.attribution import attribute
+from cca.pods import load_pod_timelines
+from cca.render import FigureJob, add_render_arguments, render
+from cca.store import ResultStore
 
 MEMCACHED = "memcached"
 BLACKSCHOLES = "parsec-blackscholes"
@@ -16,9 +22,12 @@ VIPS = "parsec-vips"
 FREQMINE = "parsec-freqmine"
 TOTAL = "total"
 
-time_format = '%Y-%m-%dT%H:%M:%SZ'
+SLO_US = 1000
 
-mcperf = [[], [], []]
+# All timestamps are int64 epoch milliseconds (UTC)
+mcperf = []
+timelines = []
+store = ResultStore()
 
 runtimes = {
     BLACKSCHOLES: [],
@@ -31,57 +40,34 @@ runtimes = {
     TOTAL: []
 }
 
-for i in range(1, 4):
-    run_dir = f"RUN{i}"
-    pods_file = run_dir + f"/pods_{i}.json"
-
-    with open(pods_file) as f:
-        json_file = json.load(f)
-
-        start_times = []
-        completion_times = []
-
-        for item in json_file['items']:
-            name = item['status']['containerStatuses'][0]['name']
-            if str(name) != "memcached":
-                # need to add 2 hours because of time difference
-                start_time = datetime.datetime.strptime(
-                    item['status']['containerStatuses'][0]['state']['terminated']['startedAt'],
-                    time_format) + datetime.timedelta(hours=2)
-                completion_time = datetime.datetime.strptime(
-                        item['status']['containerStatuses'][0]['state']['terminated']['finishedAt'],
-                        time_format) + datetime.timedelta(hours=2)
-                start_times.append(start_time)
-                completion_times.append(completion_time)
-                runtimes[name].append((start_time, completion_time, (completion_time - start_time).seconds))
-
-        total_start = min(start_times)
-        total_end = max(completion_times)
-        runtimes[TOTAL].append((total_start, total_end, (total_end - total_start).seconds))
-
-    mperf_file = run_dir + f"/mcperf_{i}.txt"
-
-    with open(mperf_file) as f:
-        reader = csv.reader(f, delimiter=' ', skipinitialspace=True)
-        next(reader, None)
-        start_date = None
-        for row in reader:
-            p95_latency = float(row[12])
-            start = datetime.datetime.fromtimestamp(float(row[18]) / 1000)
-            end = datetime.datetime.fromtimestamp(float(row[19]) / 1000)
-
-            mcperf[i - 1].append((p95_latency, start, end))
-
 means = {}
 stds = {}
 
-for (job, timings) in runtimes.items():
-    raw_timings = [t[2] for t in timings]
-    m = mean(raw_timings)
-    s = stdev(raw_timings)
+def load_runs():
+    pods_files = [f"RUN{i}/pods_{i}.json" for i in range(1, 4)]
+    pod_timelines = load_pod_timelines(pods_files)
+
+    for i in range(1, 4):
+        timeline = pod_timelines[pods_files[i - 1]]
+        timeline = timeline[timeline["job"] != MEMCACHED]
+        timelines.append(timeline)
+
+        for (name, start_ms, end_ms) in timeline[["job", "start_ms", "end_ms"]].itertuples(index=False):
+            runtimes[name].append((int(start_ms), int(end_ms), int(end_ms - start_ms) // 1000))
+
+        total_start = int(timeline["start_ms"].min())
+        total_end = int(timeline["end_ms"].max())
+        runtimes[TOTAL].append((total_start, total_end, (total_end - total_start) // 1000))
+
+        mcperf.append(store.query(["p95", "ts_start", "ts_end"], experiment="part3", run=i))
 
-    means[job] = m
-    stds[job] = s
+    for (job, timings) in runtimes.items():
+        raw_timings = [t[2] for t in timings]
+        m = mean(raw_timings)
+        s = stdev(raw_timings)
+
+        means[job] = m
+        stds[job] = s
 
 def print_table():
     table = f"""
@@ -103,61 +89,88 @@ def print_table():
 """
     print(table)
 
-def create_figures():
-    
+def print_attribution():
+    per_run = []
     for i in range(0, 3):
-        start = runtimes[TOTAL][i][0].timestamp()
-        x_vals = []
-        widths = []
-        y_vals = [m[0] / 1000 for m in mcperf[i]]
-
-        for entry in mcperf[i]:
-            x_vals.append(entry[1].timestamp() - start)
-            widths.append(entry[2].timestamp() - entry[1].timestamp())
-
-        fig, (ax2, ax1) = plt.subplots(2, 1, sharex=True)
-        fig.set_size_inches(10.5, 5.5)
-        fig.suptitle(f'Run {i + 1}', fontsize=22)
-        ax1.bar(x_vals, y_vals, widths, align='edge')
-
-        ax1.set_ylabel('p95 latency (ms)')
-        ax1.set_xlabel('Time (s)')
-
-        # Fixing random state for reproducibility
-        # Example data
-        nodes = ["node-a-2", "node-b-4", "node-c-8"]
-
-        blackscholes_start = runtimes[BLACKSCHOLES][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(0, width=runtimes[BLACKSCHOLES][i][2], height=0.25, left=blackscholes_start, color="#CCA000", label="blackscholes")
-
-        freqmine_start = runtimes[FREQMINE][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(2, width=runtimes[FREQMINE][i][2], height=0.25, left=freqmine_start, color="#0CCA00", label="freqmine")
-
-        vips_start = runtimes[VIPS][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(2 - 1/16, width=runtimes[VIPS][i][2], height=0.125, left=vips_start, color="#CC0A00", label="vips")
-
-        radix_start = runtimes[RADIX][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(2 + 1/16, width=runtimes[RADIX][i][2], height=0.125, left=radix_start, color="#00CCA0", label="radix")
-
-        ferret_start = runtimes[FERRET][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(1 + 1/16, width=runtimes[FERRET][i][2], height=0.125, left=ferret_start, color="#AACCCA", label="ferret")
-
-        canneal_start = runtimes[CANNEAL][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(1 - 1/16, width=runtimes[CANNEAL][i][2], height=0.125, left=canneal_start, color="#CCCCAA", label="canneal")
-
-        dedup_start = runtimes[DEDUP][i][0].timestamp() - runtimes[TOTAL][i][0].timestamp()
-        ax2.barh(1 - 1/16, width=runtimes[DEDUP][i][2], height=0.125, left=dedup_start, color="#CCACCA", label="dedup")
-
-        ax2.set_yticks([0, 1, 2], labels=nodes)
-        ax2.tick_params(axis=u'both', which=u'both',length=0)
-        ax2.spines['top'].set_visible(False)
-        ax2.spines['right'].set_visible(False)
-        ax2.spines['bottom'].set_visible(False)
-        ax2.spines['left'].set_visible(False)
-        ax2.set_aspect(20)
-
-        fig.legend(ncol=1, loc="upper right")
-        plt.savefig(f"p3_run{i}.pdf")
-        # plt.show()
-
-create_figures()
\ No newline at end of file
+        report = attribute(mcperf[i], timelines[i], SLO_US)
+        print(f"Run {i + 1}: {report['total']['violations'][0]} of {report['total']['windows'][0]} windows "
+              f"above the {SLO_US}us SLO ({report['total']['violation_ratio'][0]:.1%})")
+        print(report["node"].to_string(index=False))
+        print(report["co_running"].to_string(index=False))
+        print()
+        per_run.append(report["job"])
+
+    jobs = pd.concat(per_run).groupby("job")[["windows", "violations"]].sum()
+    jobs["violation_ratio"] = jobs["violations"] / jobs["windows"]
+    print("All runs, per job:")
+    print(jobs.to_string())
+
+def draw_run(data, run):
+    mcperf_run = data["mcperf"]
+    times = data["runtimes"]
+    start = times[TOTAL][0]
+    ts_start = mcperf_run["ts_start"].to_numpy()
+    x_vals = (ts_start - start) / 1000
+    widths = (mcperf_run["ts_end"].to_numpy() - ts_start) / 1000
+    y_vals = mcperf_run["p95"].to_numpy() / 1000
+
+    fig = Figure()
+    (ax2, ax1) = fig.subplots(2, 1, sharex=True)
+    fig.set_size_inches(10.5, 5.5)
+    fig.suptitle(f'Run {run}', fontsize=22)
+    ax1.bar(x_vals, y_vals, widths, align='edge')
+
+    ax1.set_ylabel('p95 latency (ms)')
+    ax1.set_xlabel('Time (s)')
+
+    # Fixing random state for reproducibility
+    # Example data
+    nodes = ["node-a-2", "node-b-4", "node-c-8"]
+
+    blackscholes_start = (times[BLACKSCHOLES][0] - times[TOTAL][0]) / 1000
+    ax2.barh(0, width=times[BLACKSCHOLES][2], height=0.25, left=blackscholes_start, color="#CCA000", label="blackscholes")
+
+    freqmine_start = (times[FREQMINE][0] - times[TOTAL][0]) / 1000
+    ax2.barh(2, width=times[FREQMINE][2], height=0.25, left=freqmine_start, color="#0CCA00", label="freqmine")
+
+    vips_start = (times[VIPS][0] - times[TOTAL][0]) / 1000
+    ax2.barh(2 - 1/16, width=times[VIPS][2], height=0.125, left=vips_start, color="#CC0A00", label="vips")
+
+    radix_start = (times[RADIX][0] - times[TOTAL][0]) / 1000
+    ax2.barh(2 + 1/16, width=times[RADIX][2], height=0.125, left=radix_start, color="#00CCA0", label="radix")
+
+    ferret_start = (times[FERRET][0] - times[TOTAL][0]) / 1000
+    ax2.barh(1 + 1/16, width=times[FERRET][2], height=0.125, left=ferret_start, color="#AACCCA", label="ferret")
+
+    canneal_start = (times[CANNEAL][0] - times[TOTAL][0]) / 1000
+    ax2.barh(1 - 1/16, width=times[CANNEAL][2], height=0.125, left=canneal_start, color="#CCCCAA", label="canneal")
+
+    dedup_start = (times[DEDUP][0] - times[TOTAL][0]) / 1000
+    ax2.barh(1 - 1/16, width=times[DEDUP][2], height=0.125, left=dedup_start, color="#CCACCA", label="dedup")
+
+    ax2.set_yticks([0, 1, 2], labels=nodes)
+    ax2.tick_params(axis=u'both', which=u'both',length=0)
+    ax2.spines['top'].set_visible(False)
+    ax2.spines['right'].set_visible(False)
+    ax2.spines['bottom'].set_visible(False)
+    ax2.spines['left'].set_visible(False)
+    ax2.set_aspect(20)
+
+    fig.legend(ncol=1, loc="upper right")
+    return fig
+
+def figure_jobs():
+    jobs = []
+    for i in range(0, 3):
+        data = {"mcperf": mcperf[i], "runtimes": {job: timings[i] for (job, timings) in runtimes.items()}}
+        jobs.append(FigureJob(f"p3_run{i}.pdf", draw_run, data, {"run": i + 1}))
+    return jobs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot the part3 runs and attribute SLO violations.")
+    add_render_arguments(parser)
+    args = parser.parse_args()
+
+    load_runs()
+    print_attribution()
+    render(figure_jobs(), workers=args.workers, preview=args.preview, force=args.force)
\ No newline at end of file
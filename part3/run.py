@@ -1,9 +1,16 @@
+import argparse
 import datetime
+import json
 import logging
-import re
-import subprocess
-import time
+import os
+import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import yaml
+
+from cca.kube import ClusterClient
+from cca.schedule import Plan, apply_placement, manifest_placement
+from cca.watch import job_succeeded
 
 MEMCACHED = "memcached"
 BLACKSCHOLES = "parsec-blackscholes"
@@ -24,16 +31,17 @@ RUN_DIR = f"RUN{RUN}"
 LOG_FILE = f"{RUN_DIR}/stdout.log"
 PODS_OUT = f"{RUN_DIR}/results.json"
 
-root = logging.getLogger()
-root.setLevel(logging.DEBUG)
+def setup_logging():
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
 
-# stdout_handler = logging.StreamHandler()
-# stdout_handler.setLevel(logging.DEBUG)
-# root.addHandler(stdout_handler)
+    # stdout_handler = logging.StreamHandler()
+    # stdout_handler.setLevel(logging.DEBUG)
+    # root.addHandler(stdout_handler)
 
-file_handler = logging.FileHandler(filename=LOG_FILE, encoding='utf-8')
-file_handler.setLevel(logging.DEBUG)
-root.addHandler(file_handler)
+    file_handler = logging.FileHandler(filename=LOG_FILE, encoding='utf-8')
+    file_handler.setLevel(logging.DEBUG)
+    root.addHandler(file_handler)
 
 def info(msg):
     print(f"INFO: {msg}")
@@ -58,85 +66,87 @@ dependents = {
 
 start_jobs = [BLACKSCHOLES, FREQMINE, CANNEAL, FERRET]
 
-def run(cmd, log=True):
-    out = subprocess.run(cmd, capture_output=True)
-    stdout = out.stdout.decode('unicode_escape').strip()
-    stderr = out.stderr.decode('unicode_escape').strip()
-    if log and out.stdout:
-        logging.info(f"CMD OUT: {stdout}")
-
-    if log and out.stderr:
-        logging.error(f"CMD ERR: {stderr}")
+# Jobs that have to finish before a job is started
+after = {dependent: [job] for (job, jobs) in dependents.items() for dependent in jobs}
 
-    return stdout
+client = ClusterClient()
 
 def clear():
-    run(["kubectl", "delete", "jobs", "--all"])
+    client.delete_all("Job")
+
+def hand_written_plan():
+    placements = {}
+    for job in ALL_JOBS:
+        with open(get_yaml(job), "r") as f:
+            placements[job] = manifest_placement(yaml.safe_load(f), after.get(job, ()))
+    return Plan(placements)
 
 class JobScheduler:
-    def __init__(self) -> None:
+    def __init__(self, plan=None) -> None:
         self.finished_jobs = []
-        self.iter_counter = 0
+        self.created_jobs = []
+        self.placements = plan.placements if plan is not None else {}
+        self.after = plan.after if plan is not None else after
 
-        for job in start_jobs:
+        for job in (plan.start_jobs if plan is not None else start_jobs):
             self.create_job(job)
 
     def create_job(self, job):
         info(f"Creating job {job} at {datetime.datetime.now()}")
-        run(["kubectl", "create", "-f", get_yaml(job)])
+        self.created_jobs.append(job)
+        with open(get_yaml(job), "r") as f:
+            manifest = yaml.safe_load(f)
+        if job in self.placements:
+            manifest = apply_placement(manifest, self.placements[job])
+        client.create(manifest)
 
     def finish_job(self, job):
         print(f"Job {job} finished at {datetime.datetime.now()}.")
         self.finished_jobs.append(job)
-        if job in dependents:
-            for dependent in dependents[job]:
+        for (dependent, blockers) in self.after.items():
+            if dependent not in self.created_jobs and all(b in self.finished_jobs for b in blockers):
                 self.create_job(dependent)
 
-    def check(self):
-        if self.iter_counter % 10 == 0:
-            # Just to get some info in the log
-            run(["kubectl", "get", "jobs"])
-            run(["kubectl", "get", "pods", "-o", "wide"])
-
-        pod_stats = get_pod_stats()
-        is_finished = True
+    def on_job_event(self, event_type, job_obj):
+        job = job_obj["metadata"]["name"]
+        logging.info(f"JOB EVENT: {event_type} {job} {job_obj.get('status', {})}")
+        if job in ALL_JOBS and job not in self.finished_jobs and job_succeeded(job_obj):
+            self.finish_job(job)
 
-        for (job, status) in pod_stats.items():
-            if status: 
-                if job not in self.finished_jobs:
-                    self.finish_job(job)
-            else:
-                is_finished = False
+    def is_finished(self):
+        return all(job in self.finished_jobs for job in ALL_JOBS)
 
-        self.iter_counter += 1
-        
-        return is_finished
+    def run(self):
+        # Dependents are created as soon as the completion event arrives. The
+        # watch resumes after the last event when the API server closes it; a
+        # relist replays current state and finished jobs are ignored.
+        for (event_type, job_obj) in client.watch_forever("Job"):
+            self.on_job_event(event_type, job_obj)
+            if self.is_finished():
+                break
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the part3 PARSEC schedule next to memcached.")
+    parser.add_argument("--plan", help="JSON plan from `python -m cca.schedule -o`; defaults to the hand-written schedule")
+    parser.add_argument("--dump-plan", metavar="FILE", help="write the hand-written schedule as a plan (for cca.simulate) and exit")
+    args = parser.parse_args()
 
-def get_pod_stats():
-    pod_stats = {}
-    out = run(["kubectl", "get", "jobs"], log=False)
+    if args.dump_plan:
+        hand_written_plan().save(args.dump_plan)
+        sys.exit(0)
 
-    for job in ALL_JOBS:
-        match = re.findall(re.compile(job + r"\s+(\d+)\/"), out)
-        if len(match) > 0:
-            pod_stats[job] = int(match[0]) == 1
-        else:
-            pod_stats[job] = False
-    
-    return pod_stats    
+    setup_logging()
 
-start = datetime.datetime.now()
-info(f"Starting at {start}")
+    start = datetime.datetime.now()
+    info(f"Starting at {start}")
 
-job_scheduler = JobScheduler()
-while not job_scheduler.check():
-    time.sleep(1)
+    job_scheduler = JobScheduler(Plan.load(args.plan) if args.plan else None)
+    job_scheduler.run()
 
-end = datetime.datetime.now()
-info(f"Finished at {end} with duration {end - start}")
+    end = datetime.datetime.now()
+    info(f"Finished at {end} with duration {end - start}")
 
-with open(PODS_OUT, 'w+') as f:
-    subprocess.run(["kubectl", "get", "pods", "-o", "json"], stdout=f)
+    with open(PODS_OUT, 'w+') as f:
+        json.dump(client.list("Pod"), f, indent=4)
 
-clear()
\ No newline at end of file
+    clear()
@@ -1,47 +1,57 @@
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from scipy import stats
+import argparse
+from matplotlib.figure import Figure
+
+from cca.aggregate import aggregate_by
+from cca.bootstrap import RESAMPLES
+from cca.render import FigureJob, add_render_arguments, render
+from cca.store import ResultStore, canonical_run
 
-dir = "./part4/q1/csv_outputs"
 thread_core_counts = ["t_1_c_1", "t_1_c_2", "t_2_c_1", "t_2_c_2"]
 markers = ["o", "v", "s", "*"]
-runs = 3
-
-fig = plt.figure(figsize=(28,10))
-ax = fig.gca()
-ax.set_title("Latency by QPS averaged over 3 runs", fontsize=20)
-
-for marker_idx, type in enumerate(thread_core_counts):
-    tail_arr = np.ndarray(shape=(25,3), dtype=float)
-    qps_arr = np.ndarray(shape=(25,3), dtype=float)
-    for i in range(runs):
-        index = i+1
-        file_path = f'{dir}/{type}_{index}.csv'
-        curr_df = pd.read_csv(file_path, sep=",", header=0)
-        arr = curr_df[["p95", "QPS"]].to_numpy()
-        for j in range(len(arr)):
-            tail_arr[j][i] = arr[j][0] / 1000
-            qps_arr[j][i] = arr[j][1]
-    arr = np.ndarray(shape=(25,4), dtype=float)
-    for i in range(len(tail_arr)):
-        arr[i][0] = np.mean(tail_arr[i])
-        arr[i][1] = stats.sem(tail_arr[i])
-        arr[i][2] = np.mean(qps_arr[i])
-        arr[i][3] = stats.tstd(qps_arr[i])
-    file_df = pd.DataFrame(arr, columns=["p95 Mean", "p95 SEM", "QPS Mean", "QPS STD"])
-    file_df["Type"] = type
-    ax.errorbar(x=file_df["QPS Mean"], y=file_df["p95 Mean"], xerr=file_df["QPS STD"], yerr=file_df["p95 SEM"], label=type, marker=markers[marker_idx], markersize=8, capsize=2)
-
-ax.set_xlabel("Mean Queries per Second (QPS)", fontsize=16, labelpad=10)
-ax.set_ylabel("95th Percentile Latency in Miliseconds (ms)", fontsize=16)
-ax.legend(loc='upper right', fontsize=14)
-ax.grid(True, color='lightgray', linestyle='--', linewidth=1)
-ax.tick_params(labelsize=18)
-ax.set_xlim(left=0, right=125000)
-ax.set_ylim(bottom=0, top=2.125)
-ax.set_xticks(range(0, 125001, 25000), labels=(f'{i}k' for i in range(0,126, 25)))
-if not os.path.exists("./part4/q1/plots/"):
-    os.makedirs("./part4/q1/plots")
-plt.savefig("./part4/q1/plots/part4_q1.pdf")
+# percentile column -> (axis label, y axis top)
+percentiles = {"p95": ("95th", 2.125), "p99": ("99th", 3.5)}
+
+
+def draw_latency(summary, run_label, percentile="p95"):
+    (label, top) = percentiles[percentile]
+    fig = Figure(figsize=(28,10))
+    ax = fig.gca()
+    ax.set_title(f"Latency by QPS averaged over {run_label} runs", fontsize=20)
+
+    for marker_idx, type in enumerate(thread_core_counts):
+        file_df = summary[summary["config"] == type]
+        mean = file_df[f"{percentile} mean"]
+        ax.errorbar(x=file_df["QPS mean"], y=mean, xerr=file_df["QPS std"], yerr=[mean - file_df[f"{percentile} ci low"], file_df[f"{percentile} ci high"] - mean], label=type, marker=markers[marker_idx], markersize=8, capsize=2)
+
+    ax.set_xlabel("Mean Queries per Second (QPS)", fontsize=16, labelpad=10)
+    ax.set_ylabel(f"{label} Percentile Latency in Miliseconds (ms)", fontsize=16)
+    ax.legend(loc='upper right', fontsize=14)
+    ax.grid(True, color='lightgray', linestyle='--', linewidth=1)
+    ax.tick_params(labelsize=18)
+    ax.set_xlim(left=0, right=125000)
+    ax.set_ylim(bottom=0, top=top)
+    ax.set_xticks(range(0, 125001, 25000), labels=(f'{i}k' for i in range(0,126, 25)))
+    return fig
+
+
+def figure_jobs(store=None, runs=None):
+    """``runs`` names the stored runs to plot, by default the numbered runs of the transform."""
+    store = store or ResultStore()
+    df = store.query(["p95", "p99", "QPS", "target"], experiment="part4_q1", config=thread_core_counts, run=runs or canonical_run)
+    df["p95"] = df["p95"] / 1000
+    df["p99"] = df["p99"] / 1000
+    # One row per (config, target QPS) with the p95/p99/QPS means and 95% bootstrap CIs and the QPS std over all selected runs
+    summary = aggregate_by(df, "config", ["p95", "p99", "QPS"], bootstrap=RESAMPLES)
+    run_counts = df.groupby("config")["run"].nunique()
+    run_label = f"{run_counts.min()}" if run_counts.min() == run_counts.max() else f"{run_counts.min()}-{run_counts.max()}"
+    return [FigureJob("./part4/q1/plots/part4_q1.pdf", draw_latency, summary, {"run_label": run_label}),
+            FigureJob("./part4/q1/plots/part4_q1_p99.pdf", draw_latency, summary, {"run_label": run_label, "percentile": "p99"})]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot the part4 question 1 latency curves.")
+    parser.add_argument("--runs", nargs="+", default=None, metavar="RUN",
+                        help="stored runs to plot, e.g. ingested ad-hoc runs (default: the numbered runs)")
+    add_render_arguments(parser)
+    args = parser.parse_args()
+    render(figure_jobs(runs=args.runs), workers=args.workers, preview=args.preview, force=args.force)
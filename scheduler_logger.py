@@ -1,10 +1,22 @@
-from datetime import datetime
+import atexit
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
 from enum import Enum
 import urllib.parse
 
 
 LOG_STRING = "{timestamp} {event} {job_name} {args}"
 
+BINARY_MAGIC = b"CCALOG2\n"
+BINARY_HEADER = struct.Struct("<q")
+# uint32 argument length, so long custom_event comments fit
+BINARY_RECORD = struct.Struct("<qBBI")
+# Records of version 1 logs, which had a uint16 argument length
+BINARY_RECORDS = {b"CCALOG1\n": struct.Struct("<qBBH"), BINARY_MAGIC: BINARY_RECORD}
+
 class Job(Enum):
     SCHEDULER = "scheduler"
     MEMCACHED = "memcached"
@@ -17,22 +29,156 @@ class Job(Enum):
     VIPS = "vips"
 
 
+EVENTS = ["start", "end", "update_cores", "pause", "unpause", "custom"]
+EVENT_CODES = {event: code for (code, event) in enumerate(EVENTS)}
+JOBS = list(Job)
+JOB_CODES = {job: code for (code, job) in enumerate(JOBS)}
+
+
+def _format_cores(cores):
+    return "[" + (",".join(str(i) for i in cores)) + "]"
+
+
+def _format_args(event, payload):
+    if payload is None:
+        return ""
+    if event == "start":
+        cores, threads = payload
+        return _format_cores(cores) + " " + str(threads)
+    if event == "update_cores":
+        return _format_cores(payload)
+    if event == "custom":
+        return urllib.parse.quote_plus(payload)
+    return str(payload)
+
+
 class SchedulerLogger:
-    def __init__(self):
+    """Event log of the scheduler.
+
+    Logging checks and encodes the arguments on the caller's thread, so bad
+    arguments raise at the call site, and stores them with a monotonic
+    timestamp in a preallocated ring buffer. A background thread writes the
+    events every ``flush_interval`` seconds, so at most that much of the log
+    is lost if the process dies. If writing fails, the error is raised by the
+    next logging call or by :meth:`end`. Timestamps are the start time plus
+    the monotonic clock offset and never jump. With ``binary=True`` a compact
+    ``log{date}.bin`` is written next to the text log.
+    """
+
+    def __init__(self, binary=False, capacity=65536, flush_interval=0.5, fsync=False):
         start_date = datetime.now().strftime("%Y%m%d_%H%M%S")
 
+        self.start_wall = datetime.now()
+        self.start_ns = time.monotonic_ns()
         self.file = open(f"log{start_date}.txt", "w")
+        self.binary_file = None
+        if binary:
+            self.binary_file = open(f"log{start_date}.bin", "wb")
+            wall_ns = int(self.start_wall.timestamp() * 1_000_000_000)
+            self.binary_file.write(BINARY_MAGIC + BINARY_HEADER.pack(wall_ns))
+
+        self.capacity = capacity
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self._times = [0] * capacity
+        self._events = [None] * capacity
+        self._jobs = [None] * capacity
+        self._payloads = [None] * capacity
+        self._head = 0  # next slot to write
+        self._tail = 0  # next slot to flush
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._error = None
+
+        self._thread = threading.Thread(target=self._flush_loop, name="scheduler-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self._flush)
+
         self._log("start", Job.SCHEDULER)
 
-    def _log(self, event: str, job_name: Job, args: str = "") -> None:
-        self.file.write(
-            LOG_STRING.format(timestamp=datetime.now().isoformat(), event=event, job_name=job_name.value,
-                              args=args).strip() + "\n")
+    def _check_writer(self):
+        if self._error is not None:
+            raise RuntimeError("The scheduler log writer failed") from self._error
+
+    def _log(self, event: str, job_name: Job, payload=None) -> None:
+        now = time.monotonic_ns()
+        if self._closed:
+            raise RuntimeError(f"Can't log {event} {job_name}: the scheduler log has ended")
+        self._check_writer()
+        if not isinstance(job_name, Job):
+            raise TypeError(f"Expected a Job, got {job_name!r}")
+        args = _format_args(event, payload)
+        encoded = args.encode("utf-8") if self.binary_file is not None else None
+
+        while True:
+            with self._lock:
+                if self._head - self._tail < self.capacity:
+                    slot = self._head % self.capacity
+                    self._times[slot] = now
+                    self._events[slot] = event
+                    self._jobs[slot] = job_name
+                    self._payloads[slot] = (args, encoded)
+                    self._head += 1
+                    if self._head - self._tail >= self.capacity // 2:
+                        self._wakeup.set()
+                    return
+            # The writer fell behind; drain in the caller rather than drop events
+            self._flush()
+
+    def _drain(self):
+        with self._lock:
+            records = []
+            for index in range(self._tail, self._head):
+                slot = index % self.capacity
+                records.append((self._times[slot], self._events[slot], self._jobs[slot], self._payloads[slot]))
+                self._payloads[slot] = None
+            self._tail = self._head
+        return records
+
+    def _flush(self) -> None:
+        with self._write_lock:
+            if self.file.closed:
+                return
+            records = self._drain()
+            if not records:
+                return
+
+            lines = []
+            binary = []
+            for (timestamp_ns, event, job, (args, encoded)) in records:
+                offset_ns = timestamp_ns - self.start_ns
+                timestamp = self.start_wall + timedelta(microseconds=offset_ns // 1000)
+                lines.append(LOG_STRING.format(timestamp=timestamp.isoformat(), event=event, job_name=job.value,
+                                               args=args).strip() + "\n")
+                if self.binary_file is not None:
+                    binary.append(BINARY_RECORD.pack(offset_ns, EVENT_CODES[event], JOB_CODES[job], len(encoded)) + encoded)
+
+            self.file.write("".join(lines))
+            self.file.flush()
+            if self.binary_file is not None:
+                self.binary_file.write(b"".join(binary))
+                self.binary_file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+                if self.binary_file is not None:
+                    os.fsync(self.binary_file.fileno())
+
+    def _flush_loop(self) -> None:
+        try:
+            while not self._closed:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._flush()
+        except BaseException as e:
+            # Raised again by the next _log or by end(), instead of logging silently stopping
+            self._error = e
 
     def job_start(self, job: Job, initial_cores: list[str], initial_threads: int) -> None:
         assert job != Job.SCHEDULER, "You don't have to log SCHEDULER here"
 
-        self._log("start", job, "["+(",".join(str(i) for i in initial_cores))+"] "+str(initial_threads))
+        self._log("start", job, (tuple(initial_cores), initial_threads))
 
     def job_end(self, job: Job) -> None:
         assert job != Job.SCHEDULER, "You don't have to log SCHEDULER here"
@@ -42,7 +188,7 @@ class SchedulerLogger:
     def update_cores(self, job: Job, cores: list[str]) -> None:
         assert job != Job.SCHEDULER, "You don't have to log SCHEDULER here"
 
-        self._log("update_cores", job, "["+(",".join(str(i) for i in cores))+"]")
+        self._log("update_cores", job, tuple(cores))
 
     def job_pause(self, job: Job) -> None:
         assert job != Job.SCHEDULER, "You don't have to log SCHEDULER here"
@@ -55,9 +201,44 @@ class SchedulerLogger:
         self._log("unpause", job)
 
     def custom_event(self, job:Job, comment: str):
-        self._log("custom", job, urllib.parse.quote_plus(comment))
+        self._log("custom", job, comment)
 
     def end(self) -> None:
-        self._log("end", Job.SCHEDULER)
-        self.file.flush()
-        self.file.close()
+        try:
+            self._log("end", Job.SCHEDULER)
+        finally:
+            self._closed = True
+            self._wakeup.set()
+            self._thread.join()
+            try:
+                if self._error is None:
+                    self._flush()
+            finally:
+                atexit.unregister(self._flush)
+                self.file.close()
+                if self.binary_file is not None:
+                    self.binary_file.close()
+        self._check_writer()
+
+
+def read_binary_log(file_path):
+    """Read a ``log{date}.bin`` file back as (timestamp, event, job, args) tuples."""
+    with open(file_path, "rb") as file:
+        data = file.read()
+    record = BINARY_RECORDS.get(data[:len(BINARY_MAGIC)])
+    if record is None:
+        raise ValueError(f"{file_path} is not a scheduler binary log")
+    offset = len(BINARY_MAGIC)
+    (start_wall_ns,) = BINARY_HEADER.unpack_from(data, offset)
+    offset += BINARY_HEADER.size
+    start_wall = datetime.fromtimestamp(start_wall_ns / 1_000_000_000)
+
+    events = []
+    while offset + record.size <= len(data):
+        offset_ns, event_code, job_code, length = record.unpack_from(data, offset)
+        offset += record.size
+        args = data[offset:offset + length].decode("utf-8")
+        offset += length
+        timestamp = start_wall + timedelta(microseconds=offset_ns // 1000)
+        events.append((timestamp, EVENTS[event_code], JOBS[job_code], args))
+    return events
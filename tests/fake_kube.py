@@ -0,0 +1,224 @@
+import copy
+import json
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# plural -> kind, for the resources cca.kube knows
+KINDS = {"pods": "Pod", "services": "Service", "jobs": "Job"}
+
+
+class FakeApiServer:
+    """In-memory stand-in for the Kubernetes REST API on a local port.
+
+    Supports what :class:`cca.kube.ClusterClient` uses: create, get, list and
+    delete (single and collection, with ``name=value`` label selectors), pod
+    logs and watches with ``resourceVersion``, ``labelSelector``,
+    ``fieldSelector=metadata.name=...`` and ``timeoutSeconds``. Tests change
+    objects with :meth:`update` and drop old watch history with
+    :meth:`compact` to provoke ``410 Gone``.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.logs = {}
+        self.events = []
+        self.oldest_version = 0
+        self.version = 0
+        # How long a watch without timeoutSeconds stays open
+        self.watch_timeout = 60
+        self.condition = threading.Condition()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _record(self, event_type, plural, obj):
+        """Bump the resource version and append a watch event; caller holds the condition."""
+        self.version += 1
+        obj["metadata"]["resourceVersion"] = str(self.version)
+        self.events.append((self.version, event_type, plural, copy.deepcopy(obj)))
+        self.condition.notify_all()
+
+    def create(self, plural, manifest):
+        obj = copy.deepcopy(manifest)
+        obj["metadata"]["uid"] = str(uuid.uuid4())
+        obj["metadata"].setdefault("namespace", "default")
+        obj.setdefault("status", {})
+        with self.condition:
+            key = (plural, obj["metadata"]["name"])
+            if key in self.objects:
+                return None
+            self.objects[key] = obj
+            self._record("ADDED", plural, obj)
+            return copy.deepcopy(obj)
+
+    def update(self, plural, name, status):
+        with self.condition:
+            obj = self.objects[(plural, name)]
+            obj["status"] = status
+            self._record("MODIFIED", plural, obj)
+
+    def delete(self, plural, name):
+        with self.condition:
+            obj = self.objects.pop((plural, name), None)
+            if obj is not None:
+                self._record("DELETED", plural, obj)
+            return obj
+
+    def compact(self):
+        """Forget the watch history, like etcd compaction does."""
+        with self.condition:
+            self.events.clear()
+            self.oldest_version = self.version
+
+    def matching(self, plural, labels=None, name=None):
+        with self.condition:
+            return [copy.deepcopy(obj) for ((p, n), obj) in sorted(self.objects.items())
+                    if p == plural and matches(obj, labels, name)]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, content_type="application/json"):
+                data = (json.dumps(body) if content_type == "application/json" else body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self, name):
+                self._reply(404, {"kind": "Status", "status": "Failure", "reason": "NotFound",
+                                  "message": f"{name} not found", "code": 404})
+
+            def _parse(self):
+                url = urllib.parse.urlsplit(self.path)
+                params = dict(urllib.parse.parse_qsl(url.query))
+                parts = url.path.strip("/").split("/")
+                index = parts.index("namespaces")
+                plural, rest = parts[index + 2], parts[index + 3:]
+                return plural, (rest[0] if rest else None), (rest[1] if len(rest) > 1 else None), params
+
+            def do_GET(self):
+                plural, name, subresource, params = self._parse()
+                if params.get("watch") == "true":
+                    return self._watch(plural, params)
+                if subresource == "log":
+                    if name not in server.logs:
+                        return self._not_found(name)
+                    return self._reply(200, server.logs[name], "text/plain")
+                if name is not None:
+                    items = server.matching(plural, name=name)
+                    return self._reply(200, items[0]) if items else self._not_found(name)
+                items = server.matching(plural, parse_selector(params.get("labelSelector")))
+                self._reply(200, {"kind": f"{KINDS[plural]}List", "metadata": {"resourceVersion": str(server.version)},
+                                  "items": items})
+
+            def do_POST(self):
+                plural, _, _, _ = self._parse()
+                manifest = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                obj = server.create(plural, manifest)
+                if obj is None:
+                    return self._reply(409, {"kind": "Status", "reason": "AlreadyExists", "code": 409,
+                                             "message": f"{manifest['metadata']['name']} already exists"})
+                self._reply(201, obj)
+
+            def do_DELETE(self):
+                plural, name, _, params = self._parse()
+                if name is not None:
+                    obj = server.delete(plural, name)
+                    return self._reply(200, obj) if obj is not None else self._not_found(name)
+                deleted = [server.delete(plural, obj["metadata"]["name"])
+                           for obj in server.matching(plural, parse_selector(params.get("labelSelector")))]
+                self._reply(200, {"kind": f"{KINDS[plural]}List", "items": deleted})
+
+            def _send_event(self, event_type, obj):
+                self.wfile.write(json.dumps({"type": event_type, "object": obj}).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+            def _watch(self, plural, params):
+                try:
+                    self._stream_events(plural, params)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped watching
+                    pass
+
+            def _stream_events(self, plural, params):
+                # No Content-Length: the body runs until the server closes the connection
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                labels = parse_selector(params.get("labelSelector"))
+                name = parse_field_selector(params.get("fieldSelector"))
+                deadline = time.monotonic() + float(params.get("timeoutSeconds", server.watch_timeout))
+                with server.condition:
+                    if "resourceVersion" in params:
+                        since = int(params["resourceVersion"])
+                        if since < server.oldest_version:
+                            return self._send_event("ERROR", {"kind": "Status", "status": "Failure", "reason": "Expired",
+                                                              "message": f"too old resource version: {since}", "code": 410})
+                    else:
+                        # The initial listing of a watch without resourceVersion
+                        for obj in server.matching(plural, labels, name):
+                            self._send_event("ADDED", obj)
+                        since = server.version
+                while True:
+                    with server.condition:
+                        pending = [e for e in server.events if e[0] > since]
+                        if not pending:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                return
+                            server.condition.wait(min(remaining, 0.1))
+                            continue
+                    for (version, event_type, event_plural, obj) in pending:
+                        since = version
+                        if event_plural == plural and matches(obj, labels, name):
+                            self._send_event(event_type, obj)
+
+        return Handler
+
+
+def parse_selector(selector):
+    if not selector:
+        return None
+    return dict(term.split("=", 1) for term in selector.split(","))
+
+
+def parse_field_selector(selector):
+    if not selector:
+        return None
+    field, _, value = selector.partition("=")
+    if field != "metadata.name":
+        raise ValueError(f"Unsupported field selector {selector}")
+    return value
+
+
+def matches(obj, labels=None, name=None):
+    if name is not None and obj["metadata"]["name"] != name:
+        return False
+    obj_labels = obj["metadata"].get("labels", {})
+    return all(obj_labels.get(k) == v for (k, v) in (labels or {}).items())
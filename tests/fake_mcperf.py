@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Stand-in for the mcperf binary with a memcached whose p95 crosses 1000us at a known load.
+
+Understands ``--loadonly`` and ``--scan low:high:step``; other flags are
+ignored. The environment sets the behaviour:
+
+FAKE_MCPERF_KNEE      target QPS at which p95 reaches 1000us (default 60000)
+FAKE_MCPERF_CAPACITY  highest QPS the server achieves (default unlimited)
+FAKE_MCPERF_DELAY     seconds between result lines, to exercise streaming (default 0)
+FAKE_MCPERF_CALLS     file to append every invocation to
+"""
+import os
+import sys
+import time
+
+HEADER = ("#type       avg     std     min      p5     p10     p50     p67     p75     p80     p85     p90     p95     p99"
+          "    p999   p9999      QPS   target")
+# p5 ... p9999 relative to p95
+SHAPE = (0.4, 0.5, 0.7, 0.8, 0.85, 0.88, 0.9, 0.95, 1.0, 1.3, 3.0, 9.0)
+
+
+def p95(target, knee):
+    return 1000 * (target / knee) ** 8
+
+
+def row(target, knee, capacity):
+    latency = p95(target, knee)
+    values = [0.8 * latency, 0.3 * latency, 0.2 * latency] + [latency * f for f in SHAPE]
+    return "read " + " ".join(f"{v:8.1f}" for v in values) + f" {min(target, capacity):8.1f} {target:8d}"
+
+
+def main(args):
+    calls = os.environ.get("FAKE_MCPERF_CALLS")
+    if calls:
+        with open(calls, "a") as file:
+            file.write(" ".join(args) + "\n")
+    if "--loadonly" in args:
+        return 0
+    knee = float(os.environ.get("FAKE_MCPERF_KNEE", 60000))
+    capacity = float(os.environ.get("FAKE_MCPERF_CAPACITY", "inf"))
+    delay = float(os.environ.get("FAKE_MCPERF_DELAY", 0))
+    low, high, step = map(int, args[args.index("--scan") + 1].split(":"))
+
+    print(HEADER, flush=True)
+    for target in range(low, high + 1, step):
+        time.sleep(delay)
+        print(row(target, knee, capacity), flush=True)
+    print("Warning! Detected max cpu usage > 95%")
+    print("CPU Usage Stats (%): 90.0 91.0 92.0 93.0")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from cca.attribution import attribute, overlap_ms
+
+
+def test_violations_are_attributed_to_the_overlapping_jobs():
+    mcperf = pd.DataFrame({
+        "ts_start": [0, 10, 20, 30],
+        "ts_end": [10, 20, 30, 40],
+        "p95": [500, 1500, 1200, 800],
+    })
+    timeline = pd.DataFrame({
+        "job": ["parsec-a", "parsec-b"],
+        "node": ["node-1", "node-2"],
+        "start_ms": [5, 20],
+        "end_ms": [25, 40],
+    })
+
+    assert overlap_ms(mcperf["ts_start"].to_numpy(), mcperf["ts_end"].to_numpy(),
+                      timeline["start_ms"].to_numpy(), timeline["end_ms"].to_numpy()).tolist() == [
+        [5, 0], [10, 0], [5, 10], [0, 10]]
+
+    result = attribute(mcperf, timeline)
+    assert result["total"].iloc[0].to_dict() == {"windows": 4, "violations": 2, "violation_ratio": 0.5}
+    jobs = result["job"].set_index("job")
+    assert jobs.loc["parsec-a", ["windows", "violations"]].tolist() == [3, 2]
+    assert jobs.loc["parsec-b", ["windows", "violations"]].tolist() == [2, 1]
+    co_running = result["co_running"].set_index("co_running")
+    assert co_running.loc["parsec-a+parsec-b", "violations"] == 1
+    assert co_running.loc["parsec-a", "violation_ratio"] == 0.5
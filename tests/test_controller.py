@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from cca.controller import (CombinedSampler, CoreController, McperfSampler, RecordingActuator, Sample,
+                            ThresholdPolicy)
+from scheduler_logger import Job
+
+FAKE_MCPERF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_mcperf.py")
+
+
+class NullLogger:
+    def update_cores(self, job, cores):
+        pass
+
+    def custom_event(self, job, message):
+        pass
+
+
+class CpuSampler:
+    def sample(self):
+        return Sample(time.time(), cpu=0.5)
+
+
+@pytest.fixture
+def mcperf(monkeypatch):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "45000")
+    monkeypatch.setenv("FAKE_MCPERF_DELAY", "0.05")
+    process = subprocess.Popen([sys.executable, FAKE_MCPERF, "--scan", "10000:100000:10000"],
+                               stdout=subprocess.PIPE, text=True)
+    yield process
+    process.kill()
+    process.wait()
+
+
+def wait_for(sampler, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        sample = sampler.sample()
+        if condition(sample):
+            return sample
+        time.sleep(0.01)
+    raise AssertionError("sampler never reported the expected sample")
+
+
+def test_live_controller_grows_memcached_on_streamed_latency(mcperf):
+    sampler = CombinedSampler(McperfSampler(mcperf.stdout), CpuSampler())
+    memcached, batch = RecordingActuator(), RecordingActuator()
+    controller = CoreController(ThresholdPolicy(grow_qps=10 ** 9), memcached, batch, NullLogger(), total_cores=4)
+    controller.set_batch_jobs(["job"])
+
+    quiet = wait_for(sampler, lambda s: s.p95 is not None)
+    assert quiet.cpu == 0.5 and quiet.p95 < 900
+    assert not controller.step(quiet)
+
+    # Past the knee at 45000 QPS the p95 crosses 90% of the SLO
+    assert controller.step(wait_for(sampler, lambda s: s.p95 is not None and s.p95 >= 900))
+    assert memcached.calls[-1] == (Job.MEMCACHED, [0, 1])
+    assert batch.calls[-1] == ("job", [2, 3])
+
+
+def test_stale_mcperf_rows_are_not_reported(mcperf):
+    sampler = McperfSampler(mcperf.stdout, max_age=0.0)
+    time.sleep(0.3)
+    sample = sampler.sample()
+    assert (sample.qps, sample.p95) == (None, None)
+    # Without a load signal the threshold policy keeps the cores it has
+    assert ThresholdPolicy().decide(sample, 2) == 2
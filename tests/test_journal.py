@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from cca.journal import Journal, collect, pending_trials
+
+KEYS = [("blackscholes", "none"), ("blackscholes", "cpu"), ("canneal", "none")]
+
+
+def test_truncated_last_line_is_skipped_and_cut_on_the_next_record(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(str(path))
+    journal.record(KEYS[0], 0, {"real": "1m0.000s"})
+    # A crash in the middle of the next append
+    with open(path, "a") as file:
+        file.write('{"key": ["blackscholes", "cpu"], "repetition": 0, "res')
+
+    assert list(journal.completed()) == [(KEYS[0], 0)]
+
+    journal.record(KEYS[1], 0, {"real": "1m5.000s"})
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["key"] for line in lines] == [list(KEYS[0]), list(KEYS[1])]
+
+
+def test_a_torn_line_before_the_end_is_an_error(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"key": ["a"], "rep\n{"key": ["b"], "repetition": 0, "result": 1}\n')
+    with pytest.raises(json.JSONDecodeError):
+        Journal(str(path)).entries()
+
+
+def test_a_duplicate_trial_keeps_the_last_result(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    journal.record(KEYS[0], 0, "first")
+    journal.record(KEYS[0], 1, "other repetition")
+    journal.record(KEYS[0], 0, "rerun")
+
+    completed = journal.completed()
+    assert completed == {(KEYS[0], 0): "rerun", (KEYS[0], 1): "other repetition"}
+
+
+def test_resume_skips_the_completed_trials(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    journal.record(KEYS[0], 0, 10)
+    journal.record(KEYS[0], 1, 12)
+    journal.record(KEYS[2], 0, 20)
+
+    # Keys come back from JSON as lists; pending_trials compares them as tuples
+    completed = Journal(journal.file_path).completed()
+    pending = pending_trials(KEYS, repetitions=2, completed=completed)
+    assert pending == [(KEYS[1], 0), (KEYS[1], 1), (KEYS[2], 1)]
+    assert sorted(pending_trials(KEYS, 2, completed, shuffle=True, seed=1)) == sorted(pending)
+
+    assert collect(completed, KEYS, repetitions=2) == {KEYS[0]: [10, 12]}
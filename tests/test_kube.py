@@ -0,0 +1,112 @@
+import itertools
+import time
+
+import pytest
+
+from cca.kube import ApiError, ClusterClient, HttpBackend
+from fake_kube import FakeApiServer
+
+
+def job(name, **labels):
+    return {"apiVersion": "batch/v1", "kind": "Job", "metadata": {"name": name, "labels": labels}, "spec": {}}
+
+
+@pytest.fixture
+def server():
+    with FakeApiServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = ClusterClient(HttpBackend(server.url))
+    yield client
+    client.close()
+
+
+def names(items):
+    return [item["metadata"]["name"] for item in items]
+
+
+def test_list_filters_by_label(client):
+    client.create(job("a", group="x"))
+    client.create(job("b", group="y"))
+    client.create(job("c", group="x"))
+    assert names(client.list("Job")["items"]) == ["a", "b", "c"]
+    assert names(client.list("Job", label_selector="group=x")["items"]) == ["a", "c"]
+
+
+def test_get_missing_raises_api_error(client):
+    with pytest.raises(ApiError) as error:
+        client.get("Job", "missing")
+    assert error.value.status == 404
+
+
+def test_delete_ignores_missing_and_delete_all_empties(client):
+    client.create(job("a"))
+    client.create(job("b"))
+    client.delete("Job", "a")
+    client.delete("Job", "a")
+    assert names(client.list("Job")["items"]) == ["b"]
+    client.delete_all("Job")
+    assert client.list("Job")["items"] == []
+
+
+def test_watch_replays_state_then_streams_changes(server, client):
+    client.create(job("a"))
+    events = client.watch("Job", timeout_seconds=5)
+    assert next(events)[0] == "ADDED"
+    server.update("jobs", "a", {"succeeded": 1})
+    client.delete("Job", "a")
+    (modified, obj), (deleted, _) = next(events), next(events)
+    events.close()
+    assert (modified, deleted) == ("MODIFIED", "DELETED")
+    assert obj["status"] == {"succeeded": 1}
+
+
+def test_watch_selects_by_name_and_ends_after_timeout(server, client):
+    client.create(job("a"))
+    client.create(job("b"))
+    events = list(client.watch("Job", field_selector="metadata.name=b", timeout_seconds=1))
+    assert [(t, o["metadata"]["name"]) for (t, o) in events] == [("ADDED", "b")]
+
+
+def test_watch_forever_resumes_after_the_last_event(server, client):
+    server.watch_timeout = 0.5
+    client.create(job("a"))
+    events = client.watch_forever("Job")
+    assert next(events)[1]["metadata"]["name"] == "a"
+    # The first watch ends here; the next one resumes instead of replaying "a"
+    time.sleep(1)
+    client.create(job("b"))
+    event_type, obj = next(events)
+    events.close()
+    assert (event_type, obj["metadata"]["name"]) == ("ADDED", "b")
+
+
+def test_watch_forever_relists_on_expired_resource_version(server, client):
+    client.create(job("a"))
+    version = client.list("Job")["metadata"]["resourceVersion"]
+    client.create(job("b"))
+    server.compact()
+
+    # The event that created "b" is gone, so resuming from before it fails
+    events = list(client.watch("Job", resource_version=version, timeout_seconds=1))
+    assert [t for (t, _) in events] == ["ERROR"]
+    assert events[0][1]["code"] == 410
+
+    server.watch_timeout = 0.5
+    events = client.watch_forever("Job")
+    assert [o["metadata"]["name"] for (_, o) in itertools.islice(events, 2)] == ["a", "b"]
+    # Expire the version the next watch resumes from: it relists instead of failing
+    time.sleep(1)
+    client.create(job("c"))
+    server.compact()
+    replayed = [(t, o["metadata"]["name"]) for (t, o) in itertools.islice(events, 3)]
+    events.close()
+    assert replayed == [("ADDED", "a"), ("ADDED", "b"), ("ADDED", "c")]
+
+
+def test_logs(server, client):
+    server.logs["pod"] = "real\t0m1.0s\n"
+    assert client.logs("pod") == "real\t0m1.0s\n"
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from cca import loadgen
+from cca.loadgen import KneeSearch, McperfClient
+from cca.mcperf import read_mcperf
+
+FAKE_MCPERF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_mcperf.py")
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    calls = tmp_path / "calls"
+    monkeypatch.setenv("FAKE_MCPERF_CALLS", str(calls))
+    return calls
+
+
+def search(**kwargs):
+    client = McperfClient("server", "agent", binary=FAKE_MCPERF)
+    return KneeSearch(client.measure, log=lambda message: None, **kwargs)
+
+
+def test_knee_search_brackets_the_slo_crossing(monkeypatch, calls):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "62500")
+    knee = search()
+    good, bad = knee.run()
+    assert good < 62500 < bad
+    assert bad - good <= 1000
+    # A fixed 1000 QPS scan of the range would take 121 runs
+    assert len(knee.points) == len(calls.read_text().splitlines()) < 20
+
+
+def test_knee_search_stops_where_qps_falls_behind(monkeypatch, calls):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "1000000")
+    monkeypatch.setenv("FAKE_MCPERF_CAPACITY", "40000")
+    good, bad = search().run()
+    # 5% tolerance: 40000 QPS still counts for targets up to 42105
+    assert good <= 42105 < bad
+
+
+def test_knee_search_without_a_violation(monkeypatch, calls):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "1000000")
+    assert search(high=45000).run() == (45000, None)
+
+
+def test_main_writes_a_scan_file(tmp_path, monkeypatch, calls):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "62500")
+    output = tmp_path / "scan.txt"
+    loadgen.main(["-s", "server", "-a", "agent", "-o", str(output), "--mcperf", FAKE_MCPERF])
+    assert "--loadonly" in calls.read_text().splitlines()[0]
+    df = read_mcperf(output)
+    assert list(df["target"]) == sorted(df["target"])
+    assert df["p95"].max() > 1000 >= df["p95"].min()
@@ -0,0 +1,41 @@
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from cca.log_analysis import local_utc_offsets_ms, overlap_counts, read_log
+
+WINDOW_START = np.array([0, 10, 20])
+WINDOW_END = np.array([10, 20, 30])
+
+
+def test_overlap_counts_only_counts_windows_an_interval_overlaps():
+    starts = np.array([5, 10, 25, 30, 12])
+    ends = np.array([15, 20, 40, 40, 18])
+    # Touching a window boundary is no overlap
+    assert overlap_counts(starts, ends, WINDOW_START, WINDOW_END).tolist() == [2, 1, 1, 0, 1]
+
+
+def test_overlap_counts_sums_the_window_weights():
+    weights = np.array([1, 0, 1])
+    starts, ends = np.array([0, 5]), np.array([30, 15])
+    assert overlap_counts(starts, ends, WINDOW_START, WINDOW_END, weights).tolist() == [2, 1]
+
+
+def test_local_offsets_follow_daylight_saving_time(tmp_path, monkeypatch):
+    monkeypatch.setenv("TZ", "Europe/Zurich")
+    time.tzset()
+    try:
+        # Naive local times the day before and the day of the switch to summer time in 2024
+        winter = datetime(2024, 3, 30, 12, 0)
+        summer = datetime(2024, 3, 31, 12, 0)
+        local_ms = [int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000) for dt in (winter, summer)]
+        assert local_utc_offsets_ms(local_ms).tolist() == [3_600_000, 7_200_000]
+
+        log = tmp_path / "log.txt"
+        log.write_text("2024-03-30T12:00:00 start scheduler\n2024-03-31T12:00:00 end scheduler\n")
+        assert read_log(str(log))["ts"].tolist() == [int(winter.timestamp() * 1000), int(summer.timestamp() * 1000)]
+        assert read_log(str(log), utc_offset_ms=0)["ts"].tolist() == local_ms
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
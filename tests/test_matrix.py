@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from cca.matrix import Cell, MatrixRunner, Slot, place
+
+
+def test_first_failure_cancels_the_pending_cells():
+    started = []
+
+    def run_cell(cell, slot):
+        started.append(cell)
+        if cell.suite == "bad":
+            raise RuntimeError("job failed")
+        time.sleep(0.05)
+        return cell.suite
+
+    cells = [Cell("bad", "cpu")] + [Cell(f"suite-{i}", "cpu") for i in range(5)]
+    with pytest.raises(RuntimeError, match="job failed"):
+        MatrixRunner([Slot("node-a"), Slot("node-b")], run_cell).run(cells)
+    # Only the cell that ran on the other node next to the failing one got started
+    assert len(started) <= 2
+
+
+def test_cells_never_share_a_node():
+    lock = threading.Lock()
+    running = []
+    neighbours = []
+
+    def run_cell(cell, slot):
+        with lock:
+            neighbours.extend(other for (other, node) in running if node == slot.node)
+            running.append((cell, slot.node))
+        time.sleep(0.02)
+        with lock:
+            running.remove((cell, slot.node))
+        return slot
+
+    slots = [Slot("node-a", "0"), Slot("node-a", "1"), Slot("node-b", "0"), Slot("node-b", "1")]
+    cells = [Cell(suite, interference) for suite in ("a", "b", "c") for interference in ("none", "cpu", "llc")]
+    results = MatrixRunner(slots, run_cell).run(cells)
+
+    assert set(results) == set(cells)
+    assert neighbours == []
+    assert {slot.node for slot in results.values()} == {"node-a", "node-b"}
+
+
+def test_place_fails_when_it_cannot_pin():
+    pinned = {"kind": "Pod", "metadata": {"name": "ibench-cpu"},
+              "spec": {"containers": [{"args": ["-c", "taskset -c 0 ./cpu 1200"]}]}}
+    placed = place(pinned, Slot("node-a", "2-3"), "blackscholes-cpu")
+    assert placed["metadata"]["name"] == "ibench-cpu-blackscholes-cpu"
+    assert placed["spec"]["containers"][0]["args"][1] == "taskset -c 2-3 ./cpu 1200"
+
+    unpinned = {"kind": "Job", "metadata": {"name": "parsec-vips"},
+                "spec": {"template": {"spec": {"containers": [{"args": ["-c", "./run -p vips"]}]}}}}
+    assert place(unpinned, Slot("node-a"), "x")["spec"]["template"]["spec"]["nodeSelector"]
+    with pytest.raises(ValueError, match="no taskset"):
+        place(unpinned, Slot("node-a", "0"), "x")
@@ -0,0 +1,58 @@
+import importlib.util
+import os
+import threading
+
+import pytest
+
+from cca.kube import ClusterClient, HttpBackend
+from fake_kube import FakeApiServer
+
+PART3 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "part3")
+
+
+@pytest.fixture
+def part3(monkeypatch):
+    spec = importlib.util.spec_from_file_location("part3_run", os.path.join(PART3, "run.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.chdir(PART3)
+    return module
+
+
+def complete_jobs(server, stop):
+    """Mark every job the scheduler creates as succeeded, like a cluster that runs them instantly."""
+    while not stop.is_set():
+        for job in server.matching("jobs"):
+            if not job["status"].get("succeeded"):
+                server.update("jobs", job["metadata"]["name"], {"succeeded": 1})
+        stop.wait(0.05)
+
+
+def test_dependents_start_after_their_blockers(part3):
+    timeline = []
+
+    class RecordingScheduler(part3.JobScheduler):
+        def create_job(self, job):
+            timeline.append(("created", job))
+            super().create_job(job)
+
+        def finish_job(self, job):
+            timeline.append(("finished", job))
+            super().finish_job(job)
+
+    with FakeApiServer() as server:
+        server.watch_timeout = 0.5
+        part3.client = ClusterClient(HttpBackend(server.url))
+        stop = threading.Event()
+        worker = threading.Thread(target=complete_jobs, args=(server, stop))
+        worker.start()
+        try:
+            RecordingScheduler().run()
+        finally:
+            stop.set()
+            worker.join()
+        assert sorted(job["metadata"]["name"] for job in server.matching("jobs")) == sorted(part3.ALL_JOBS)
+
+    for (dependent, blockers) in part3.after.items():
+        for blocker in blockers:
+            assert timeline.index(("finished", blocker)) < timeline.index(("created", dependent))
@@ -0,0 +1,26 @@
+import json
+
+from cca.pods import cached_pod_timelines
+from cca.watch import read_job_times
+
+DUMP = {"items": [
+    {"spec": {"nodeSelector": {"cca-project-nodetype": "node-a-2core"}},
+     "status": {"containerStatuses": [{"name": "parsec-blackscholes", "state": {"terminated": {
+         "startedAt": "2024-04-20T10:00:00Z", "finishedAt": "2024-04-20T10:01:30Z"}}}]}},
+    {"spec": {"nodeName": "node-b"},
+     "status": {"containerStatuses": [{"name": "memcached", "state": {"running": {}}}]}},
+]}
+
+
+def test_job_times_match_the_cached_timeline(tmp_path):
+    dump = tmp_path / "pods.json"
+    dump.write_text(json.dumps(DUMP))
+    cache_dir = str(tmp_path / "cache")
+
+    parsed = read_job_times(str(dump), cache_dir)
+    assert parsed == [("parsec-blackscholes", 1713607200000, 1713607290000), ("memcached", -1, -1)]
+
+    timeline = cached_pod_timelines(str(dump), cache_dir)
+    assert list(zip(timeline["job"], timeline["start_ms"], timeline["end_ms"])) == parsed
+    # Now read back from the cache pandas wrote
+    assert read_job_times(str(dump), cache_dir) == parsed
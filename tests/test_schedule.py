@@ -0,0 +1,37 @@
+from cca.schedule import DagScheduler, Node, Placement, Plan
+from cca.simulate import Simulator
+
+NODES = [Node("small", 2, (0,)), Node("big", 4)]
+RUNTIMES = {"parsec-a": 40.0, "parsec-b": 30.0, "parsec-c": 20.0, "parsec-radix": 10.0}
+PENALTIES = {job: 0.4 for job in RUNTIMES}
+
+
+def runtime(job, threads):
+    return RUNTIMES[job] / threads ** 0.8
+
+
+def test_scheduler_and_simulator_agree_on_the_plan():
+    scheduler = DagScheduler(RUNTIMES, NODES, runtime, PENALTIES, {"parsec-c": ["parsec-a"]})
+    plan = scheduler.schedule(restarts=3)
+    result = Simulator(NODES, runtime, PENALTIES).run(plan)
+    assert abs(result.makespan_ms / 1000 - plan.makespan) < 1e-3
+    for (job, p) in plan.placements.items():
+        assert abs(result.jobs[job].end_ms / 1000 - p.end) < 1e-3
+
+
+def test_radix_only_gets_powers_of_two():
+    scheduler = DagScheduler(RUNTIMES, NODES, runtime, PENALTIES)
+    assert {threads for (_, threads) in scheduler.job_options("parsec-radix")} == {1, 2, 4}
+    assert scheduler.schedule(restarts=3).placements["parsec-radix"].threads in (1, 2, 4)
+
+
+def test_jobs_on_a_node_only_slow_each_other_while_they_overlap():
+    simulator = Simulator(NODES, runtime, PENALTIES)
+    after = Plan({
+        "parsec-a": Placement("parsec-a", "big", (0, 1), 2, 0.0, 0.0, ()),
+        "parsec-b": Placement("parsec-b", "big", (2, 3), 2, 0.0, 0.0, ("parsec-a",)),
+    })
+    together = Plan({job: p._replace(after=()) for (job, p) in after.placements.items()})
+    sequential = simulator.run(after).jobs
+    assert sequential["parsec-a"].end_ms == round(runtime("parsec-a", 2) * 1000)
+    assert simulator.run(together).jobs["parsec-a"].end_ms > sequential["parsec-a"].end_ms
@@ -0,0 +1,59 @@
+import pytest
+
+from scheduler_logger import Job, SchedulerLogger, read_binary_log
+
+
+def test_binary_log_keeps_arguments_longer_than_64k(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    comment = "x" * 100_000
+    logger = SchedulerLogger(binary=True, flush_interval=0.05)
+    logger.custom_event(Job.MEMCACHED, comment)
+    logger.job_end(Job.MEMCACHED)
+    logger.end()
+
+    (log_file,) = tmp_path.glob("log*.bin")
+    events = read_binary_log(str(log_file))
+    assert [args for (_, _, _, args) in events if len(args) > 1000] == [comment]
+    assert events[-1][1:3] == ("end", Job.SCHEDULER)
+
+
+def test_bad_arguments_raise_at_the_call_site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger = SchedulerLogger(flush_interval=0.05)
+    with pytest.raises(TypeError):
+        logger.custom_event(Job.MEMCACHED, 42)
+    with pytest.raises(TypeError):
+        logger.job_end("memcached")
+    # Nothing bad was queued, so the writer keeps going
+    logger.job_end(Job.MEMCACHED)
+    logger.end()
+
+    (log_file,) = tmp_path.glob("log*.txt")
+    assert [line.split()[1:3] for line in log_file.read_text().splitlines()] == [
+        ["start", "scheduler"], ["end", "memcached"], ["end", "scheduler"]]
+
+
+def test_writer_errors_are_raised_by_the_next_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger = SchedulerLogger(flush_interval=0.01)
+
+    def fail():
+        raise OSError("disk full")
+
+    monkeypatch.setattr(logger, "_flush", fail)
+    logger._thread.join(timeout=5)
+    assert not logger._thread.is_alive()
+    with pytest.raises(RuntimeError, match="writer failed") as error:
+        logger.job_end(Job.MEMCACHED)
+    assert isinstance(error.value.__cause__, OSError)
+    with pytest.raises(RuntimeError, match="writer failed"):
+        logger.end()
+
+
+def test_logging_after_end_raises_even_with_a_full_buffer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger = SchedulerLogger(capacity=2, flush_interval=60)
+    logger.end()
+    logger._head = logger._tail + logger.capacity
+    with pytest.raises(RuntimeError, match="has ended"):
+        logger.job_end(Job.MEMCACHED)
@@ -0,0 +1,16 @@
+from cca.speedup import SpeedupModel
+
+
+def test_radix_only_gets_powers_of_two_threads():
+    # Perfect scaling, so every extra core is worth a thread
+    runtimes = {1: 80.0, 2: 40.0, 4: 20.0, 8: 10.0}
+    radix = SpeedupModel.fit("radix", runtimes, kind="amdahl")
+    assert [radix.best_threads(cores) for cores in (1, 2, 3, 5, 6, 7, 8)] == [1, 2, 2, 4, 4, 4, 8]
+
+    vips = SpeedupModel.fit("vips", runtimes, kind="amdahl")
+    assert [vips.best_threads(cores) for cores in (3, 5, 7)] == [3, 5, 7]
+
+
+def test_poorly_scaling_jobs_leave_cores_free():
+    flat = SpeedupModel.fit("canneal", {1: 60.0, 2: 58.0, 4: 57.0}, kind="amdahl")
+    assert flat.best_threads(8) == 1
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cca import stream
+from cca.mcperf import read_mcperf
+
+FAKE_MCPERF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_mcperf.py")
+
+
+def test_command_mode_stops_a_saturated_run(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "45000")
+    output = tmp_path / "scan.txt"
+    code = stream.main(["-o", str(output), "--", FAKE_MCPERF, "--scan", "10000:150000:10000"])
+    assert code == stream.SATURATED_EXIT
+    # Three intervals over the SLO in a row: 50k, 60k and 70k
+    assert read_mcperf(output)["target"].max() == 70000
+
+
+def test_command_mode_keeps_the_whole_output(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", "1000000")
+    output = tmp_path / "scan.txt"
+    assert stream.main(["-o", str(output), "--", FAKE_MCPERF, "--scan", "10000:50000:10000"]) == 0
+    assert len(read_mcperf(output)) == 5
+    assert "CPU Usage Stats" in output.read_text()
+
+
+@pytest.mark.parametrize("knee, expected", [(45000, stream.SATURATED_EXIT), (1000000, 0)])
+def test_follow_mode_reads_a_file_while_it_is_written(tmp_path, monkeypatch, knee, expected):
+    monkeypatch.setenv("FAKE_MCPERF_KNEE", str(knee))
+    monkeypatch.setenv("FAKE_MCPERF_DELAY", "0.05")
+    output = tmp_path / "scan.txt"
+    with open(output, "w") as file:
+        writer = subprocess.Popen([sys.executable, FAKE_MCPERF, "--scan", "10000:100000:10000"], stdout=file)
+    try:
+        assert stream.main(["--follow", str(output), "--idle-timeout", "1"]) == expected
+    finally:
+        writer.wait()
@@ -0,0 +1,32 @@
+import io
+import json
+
+import pytest
+
+from cca.watch import container_runs, iter_items
+
+PODS = {"apiVersion": "v1", "items": [
+    {"metadata": {"name": f"pod-{i}"}, "spec": {"nodeName": "node-a"},
+     "status": {"containerStatuses": [{"name": f"job-{i}", "state": {"terminated": {
+         "startedAt": "2024-04-20T10:00:00Z", "finishedAt": "2024-04-20T10:01:00Z"}}}]}}
+    for i in range(5)
+], "kind": "List"}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_items_are_decoded_across_chunk_boundaries(chunk_size):
+    text = json.dumps(PODS, indent=2)
+    items = list(iter_items(io.StringIO(text), chunk_size=chunk_size))
+    assert items == PODS["items"]
+    assert [run[0] for run in container_runs(items)] == [f"job-{i}" for i in range(5)]
+
+
+def test_empty_and_missing_items():
+    assert list(iter_items(io.StringIO('{"items": []}'))) == []
+    assert list(iter_items(io.StringIO('{"kind": "List"}'))) == []
+
+
+def test_truncated_dump_is_an_error():
+    text = json.dumps(PODS)
+    with pytest.raises(ValueError, match="ended inside the items array"):
+        list(iter_items(io.StringIO(text[:len(text) // 2]), chunk_size=32))